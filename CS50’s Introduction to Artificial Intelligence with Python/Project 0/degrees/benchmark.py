@@ -0,0 +1,311 @@
+"""
+Benchmarks for degrees search engines and data layouts.
+
+    python benchmark.py generate DIRECTORY [--stars N] [--seed S]
+
+writes synthetic people.csv, movies.csv and stars.csv files in which a few
+actors star in many movies and most star in one or two, plus some actors
+with no movies at all and a small island of actors and movies that shares
+no movies with the rest.
+
+    python benchmark.py run DIRECTORY [--layout dict|compact] [--queries N]
+
+loads a dataset with the given layout, answers a fixed, seeded mix of
+near, far and unreachable queries with every search engine available for
+that layout, and prints load time, peak RSS, people expanded and latency
+percentiles as JSON. Run each layout in its own process, since peak RSS
+covers the whole process.
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from itertools import accumulate
+
+import degrees
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley",
+               "Jamie", "Avery", "Quinn", "Robin", "Drew", "Kim", "Lee"]
+LAST_NAMES = ["Smith", "Jones", "Brown", "Garcia", "Miller", "Davis", "Lopez",
+              "Wilson", "Moore", "Clark", "Lewis", "Walker", "Young", "King"]
+
+# Exponent of the power law giving each actor's chance of being cast
+POPULARITY_EXPONENT = 0.8
+
+# Share of people generated without any movies
+ISOLATED_SHARE = 0.01
+
+# Share of people, movies and star rows in a separate island that shares
+# no movies with everyone else
+ISLAND_SHARE = 0.02
+
+
+def generate(directory, stars=10_000, seed=0):
+    """
+    Writes a synthetic dataset with about `stars` star rows to `directory`.
+    """
+    rng = random.Random(seed)
+    people_count = max(2, stars // 4)
+    movie_count = max(1, stars // 6)
+    isolated = max(1, int(people_count * ISOLATED_SHARE))
+    island_people = max(2, int(people_count * ISLAND_SHARE))
+    island_movies = max(1, int(movie_count * ISLAND_SHARE))
+    island_stars = max(island_people, int(stars * ISLAND_SHARE))
+    cast = max(1, people_count - isolated - island_people)
+    people_count = cast + island_people + isolated
+    movie_count = max(movie_count, island_movies + 1)
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(people_count):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {person % 997}"
+            writer.writerow([person, name, rng.randint(1900, 2005)])
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(movie_count):
+            writer.writerow([movie, f"Movie {movie}", rng.randint(1920, 2020)])
+
+    # The island's people and movies come after everyone else's, so the
+    # two are only connected if they share a movie, which they never do
+    island = cast + island_people
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        written = write_stars(writer, rng, range(cast),
+                              range(movie_count - island_movies),
+                              stars - island_stars)
+        written += write_stars(writer, rng, range(cast, island),
+                               range(movie_count - island_movies, movie_count),
+                               island_stars)
+    return {"people": people_count, "movies": movie_count, "stars": written,
+            "island_people": island_people}
+
+
+def write_stars(writer, rng, people, movies, stars):
+    """
+    Writes about `stars` star rows casting `people` in `movies`, with
+    earlier people cast far more often than the rest, and returns the
+    number written.
+    """
+    weights = list(accumulate(
+        1 / (rank + 1) ** POPULARITY_EXPONENT for rank in range(len(people))
+    ))
+    written = 0
+    movie = 0
+    while written < stars:
+        size = min(stars - written, 1 + int(rng.expovariate(1 / 5)))
+        for person in set(rng.choices(people, cum_weights=weights, k=size)):
+            writer.writerow([person, movies[movie % len(movies)]])
+            written += 1
+        movie += 1
+    return written
+
+
+def components(person_ids):
+    """
+    Returns a dictionary mapping each person_id to the first person_id
+    found in its connected component.
+    """
+    labels = {}
+    for start in person_ids:
+        if start in labels:
+            continue
+        labels[start] = start
+        stack = [start]
+        while stack:
+            person = stack.pop()
+            for _, neighbour in degrees.neighbors_for_person(person):
+                if neighbour not in labels:
+                    labels[neighbour] = start
+                    stack.append(neighbour)
+    return labels
+
+
+def query_mix(count, seed=0):
+    """
+    Returns a seeded list of (kind, source, target) queries over the
+    loaded dataset: a third each of near, far and unreachable pairs.
+
+    Near and far pairs are drawn from the largest connected component.
+    Unreachable pairs join it to another component of several people, so
+    both ends have something to search, or to a lone person if there is
+    no such component.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    labels = components(person_ids)
+    sizes = Counter(labels.values())
+    largest = max(sorted(sizes), key=sizes.get)
+    cast = [p for p in person_ids if labels[p] == largest]
+    islands = [p for p in person_ids
+               if labels[p] != largest and sizes[labels[p]] > 1]
+    isolated = [p for p in person_ids if sizes[labels[p]] == 1]
+
+    queries = []
+    for i in range(count):
+        kind = ("near", "far", "unreachable")[i % 3]
+        if kind == "unreachable" and (islands or isolated):
+            queries.append((kind, rng.choice(cast), rng.choice(islands or isolated)))
+        elif kind == "near":
+            # Two hops can lead back to the source, so draw again until not
+            source = target = None
+            while target == source:
+                source = rng.choice(cast)
+                _, middle = rng.choice(sorted(degrees.neighbors_for_person(source)))
+                _, target = rng.choice(sorted(degrees.neighbors_for_person(middle)))
+            queries.append((kind, source, target))
+        else:
+            source, target = rng.sample(cast, 2)
+            queries.append(("far", source, target))
+    return queries
+
+
+def engines(layout):
+    """Returns the search engines to benchmark for a data layout."""
+    found = {
+        "bfs": degrees.shortest_path,
+        "bidirectional": degrees.bidirectional_shortest_path,
+        "cached": degrees.cached_shortest_path,
+    }
+    if layout == "compact":
+        found["landmarks"] = degrees.landmark_shortest_path
+    return found
+
+
+def percentile(values, fraction):
+    """Returns the value at `fraction` of the sorted values, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def milliseconds(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+def peak_rss():
+    """Returns the peak resident set size of this process in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run(directory, layout="compact", queries=300, seed=0, landmarks=8):
+    """
+    Loads a dataset and times every engine on the same query mix.
+    Returns the results as a dictionary.
+    """
+    compact = layout == "compact"
+    start = time.perf_counter()
+    report = degrees.load_data(directory, compact=compact,
+                               landmarks=landmarks if compact else 0)
+    load_time = time.perf_counter() - start
+
+    # Count people expanded by the Python searches through neighbors_for_person
+    neighbors_for_person = degrees.neighbors_for_person
+    calls = [0]
+
+    def counted_neighbors(person_id):
+        calls[0] += 1
+        return neighbors_for_person(person_id)
+
+    mix = query_mix(queries, seed)
+    results = {}
+    for name, engine in engines(layout).items():
+        degrees.path_cache.clear()
+        latencies = {"near": [], "far": [], "unreachable": []}
+        lengths = []
+        calls[0] = 0
+        if degrees.graph is not None:
+            degrees.graph.expanded = 0
+        degrees.neighbors_for_person = counted_neighbors
+        degrees.path_cache.neighbors = counted_neighbors
+        try:
+            for kind, source, target in mix:
+                begin = time.perf_counter()
+                path = engine(source, target)
+                latencies[kind].append(time.perf_counter() - begin)
+                lengths.append(None if path is None else len(path))
+        finally:
+            degrees.neighbors_for_person = neighbors_for_person
+            degrees.path_cache.neighbors = neighbors_for_person
+
+        expanded = calls[0]
+        if degrees.graph is not None:
+            expanded += degrees.graph.expanded
+        every = [t for kind in latencies.values() for t in kind]
+        results[name] = {
+            "expanded": expanded,
+            "p50_ms": milliseconds(percentile(every, 0.5)),
+            "p99_ms": milliseconds(percentile(every, 0.99)),
+            "by_kind": {
+                kind: {"p50_ms": milliseconds(percentile(times, 0.5)),
+                       "p99_ms": milliseconds(percentile(times, 0.99))}
+                for kind, times in latencies.items() if times
+            },
+            "lengths": lengths,
+        }
+
+    # Every engine must agree on the degrees of separation
+    reference = next(iter(results.values()))["lengths"]
+    for name, result in results.items():
+        result["agrees"] = result.pop("lengths") == reference
+
+    return {
+        "directory": directory,
+        "layout": layout,
+        "queries": len(mix),
+        "seed": seed,
+        "load": report,
+        "load_seconds": load_time,
+        "peak_rss_bytes": peak_rss(),
+        "engines": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate")
+    generate_parser.add_argument("directory")
+    generate_parser.add_argument("--stars", type=int, default=10_000)
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("directory")
+    run_parser.add_argument("--layout", choices=("dict", "compact"),
+                            default="compact")
+    run_parser.add_argument("--queries", type=int, default=300)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--landmarks", type=int, default=8)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        print(json.dumps(generate(args.directory, args.stars, args.seed)))
+    else:
+        print(json.dumps(run(args.directory, args.layout, args.queries,
+                             args.seed, args.landmarks), indent=2))
+
+
+if __name__ == "__main__":
+    main()
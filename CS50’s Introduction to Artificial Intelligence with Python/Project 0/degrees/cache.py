@@ -0,0 +1,150 @@
+from collections import OrderedDict, deque
+
+
+class SearchTree():
+    """
+    Resumable breadth-first search tree rooted at a source person.
+
+    `parents` maps each discovered person_id to the (movie_id, person_id)
+    edge it was reached by, or None for the source. Every person within
+    `radius` degrees of the source has been discovered.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.parents = {source: None}
+        self.radius = 0
+        self.current = deque([source])
+        self.following = []
+
+    def complete(self):
+        """Returns True if the whole connected component has been explored."""
+        return not self.current and not self.following
+
+    def path_to(self, target, neighbors):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs from the
+        source to the target, resuming the search only as far as needed.
+
+        If no possible path, returns None.
+        """
+        parents = self.parents
+        while target not in parents and not self.complete():
+            if not self.current:
+                self.current = deque(self.following)
+                self.following = []
+                self.radius += 1
+            person = self.current.popleft()
+            for movie, neighbour in neighbors(person):
+                if neighbour not in parents:
+                    parents[neighbour] = (movie, person)
+                    self.following.append(neighbour)
+
+        if target not in parents:
+            return None
+        path = []
+        person = target
+        while parents[person] is not None:
+            movie, parent = parents[person]
+            path.append((movie, person))
+            person = parent
+        path.reverse()
+        return path
+
+
+class PathCache():
+    """
+    Bounded cache of search trees keyed by source person. The least
+    recently used trees are evicted once more than `capacity` trees, or
+    more than `max_entries` discovered people across all trees, are held.
+    A tree that alone outgrows `max_entries`, such as one that explored a
+    whole large component for an unreachable target, is not kept at all.
+    """
+
+    def __init__(self, neighbors, capacity=128, max_entries=1_000_000):
+        self.neighbors = neighbors
+        self.capacity = capacity
+        self.max_entries = max_entries
+        self.trees = OrderedDict()
+        self.entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.trees)
+
+    def clear(self):
+        self.trees.clear()
+        self.entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        return {
+            "size": len(self.trees),
+            "capacity": self.capacity,
+            "entries": self.entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        A tree cached for the target is reused in reverse, since starring
+        together is symmetric. If no possible path, returns None.
+        """
+        if source in self.trees:
+            self.hits += 1
+            root, other = source, target
+        elif target in self.trees:
+            self.hits += 1
+            root, other = target, source
+        else:
+            self.misses += 1
+            root, other = source, target
+            self.trees[source] = SearchTree(source)
+            self.entries += 1
+
+        tree = self.trees[root]
+        self.trees.move_to_end(root)
+        discovered = len(tree.parents)
+        path = tree.path_to(other, self.neighbors)
+        self.entries += len(tree.parents) - discovered
+        self.evict()
+
+        if path is None or root == source:
+            return path
+        return reverse_path(target, path)
+
+    def evict(self):
+        """
+        Evicts trees, least recently used first, until the cache is within
+        its bounds, dropping the most recent tree too if it alone is over.
+        """
+        while self.trees and (len(self.trees) > self.capacity
+                              or self.entries > self.max_entries):
+            if len(self.trees) == 1:
+                _, tree = self.trees.popitem()
+            else:
+                _, tree = self.trees.popitem(last=False)
+            self.entries -= len(tree.parents)
+            self.evictions += 1
+
+
+def reverse_path(source, path):
+    """
+    Reverses a list of (movie_id, person_id) pairs starting at `source`
+    so that it ends there instead.
+    """
+    people = [source] + [person for _, person in path]
+    return [
+        (path[i][0], people[i])
+        for i in range(len(path) - 1, -1, -1)
+    ]
@@ -1,6 +1,12 @@
-import csv
 import sys
+import time
 
+from cache import PathCache
+from graph import Graph
+from landmarks import LandmarkIndex, load_landmarks, save_landmarks
+from loader import TABLES, default_workers, read_dataset, read_stars
+from nameindex import NameIndex
+from snapshot import load_snapshot, save_snapshot
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,44 +18,190 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed star graph, set when loading with compact=True
+graph = None
 
-def load_data(directory):
+# LRU cache of search trees keyed by source person, reset on each load
+path_cache = None
+
+# Landmark distance index, set when loading with compact=True and landmarks
+landmark_index = None
+
+# Prefix and fuzzy index over people's names, built on first use after a load
+name_index = None
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def load_data(directory, compact=False, snapshot=True, landmarks=0, workers=1):
     """
     Load data from CSV files into memory.
+
+    The files are parsed in chunks, across a pool of `workers` processes
+    if more than one is given. Returns a report of how many people, movies
+    and stars were loaded and how many rows were rejected, and why.
+
+    If `compact` is True, the star relationships are stored only in the
+    integer-indexed `graph` instead of as sets inside `people` and `movies`.
+    Compact loads also use a binary snapshot next to the CSV files when
+    `snapshot` is True: it is mapped back if it is up to date, and written
+    after parsing the CSV files otherwise.
+
+    If `landmarks` is non-zero, compact loads also read or precompute a
+    `landmark_index` with that many landmarks, saved next to the CSV files.
     """
+    global graph, path_cache, landmark_index, name_index, names, people, movies
+    names = {}
+    people = {}
+    movies = {}
+    graph = None
+    path_cache = PathCache(neighbors_for_person)
+    landmark_index = None
+    name_index = None
+
+    if compact and snapshot and load_data_from_snapshot(directory):
+        load_landmark_index(directory, landmarks)
+        return {
+            "people": len(graph.person_ids),
+            "movies": len(graph.movie_ids),
+            "stars": len(graph.person_movies),
+            "rejected": {},
+            "snapshot": True,
+        }
+
+    # Compact loads intern star rows while reading them, once people and
+    # movies are known
+    tables, rejected = read_dataset(
+        directory, workers, tables=("people", "movies") if compact else TABLES
+    )
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+    for person_id, name, birth in tables["people"]:
+        people[person_id] = {
+            "name": name,
+            "birth": birth,
+            "movies": None if compact else set()
+        }
+        if name.lower() not in names:
+            names[name.lower()] = {person_id}
+        else:
+            names[name.lower()].add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    for movie_id, title, year in tables["movies"]:
+        movies[movie_id] = {
+            "title": title,
+            "year": year,
+            "stars": None if compact else set()
+        }
+
+    # Load stars, counting rows that refer to unknown people or movies
+    rejected["unknown person"] = 0
+    rejected["unknown movie"] = 0
+    rejected["duplicate star"] = 0
+    if compact:
+        stars = load_compact_stars(directory, workers, rejected)
+    else:
+        edges = set()
+        for person_id, movie_id in tables["stars"]:
+            if person_id not in people:
+                rejected["unknown person"] += 1
+            elif movie_id not in movies:
+                rejected["unknown movie"] += 1
+            elif movie_id in people[person_id]["movies"]:
+                rejected["duplicate star"] += 1
+            else:
+                people[person_id]["movies"].add(movie_id)
+                movies[movie_id]["stars"].add(person_id)
+                edges.add((person_id, movie_id))
+        stars = len(edges)
+
+    report = {
+        "people": len(tables["people"]),
+        "movies": len(tables["movies"]),
+        "stars": stars,
+        "rejected": rejected,
+        "snapshot": False,
+    }
+
+    if compact:
+        if snapshot:
+            save_snapshot(directory, graph, people, movies)
+        load_landmark_index(directory, landmarks)
+    return report
+
+
+def build_name_index():
+    """
+    Build `name_index` over the loaded people, ranking people who share
+    a name by how many movies they starred in, and return it. Lookups
+    build it on first use, so loading does not pay for it.
+    """
+    global name_index
+    if graph is not None:
+        def popularity(person_id):
+            p = graph.person_index[person_id]
+            return graph.person_offsets[p + 1] - graph.person_offsets[p]
+    else:
+        def popularity(person_id):
+            return len(people[person_id]["movies"])
+    name_index = NameIndex(people, popularity)
+    return name_index
+
+
+def loaded_name_index():
+    """Returns `name_index`, building it if this is its first use."""
+    return name_index if name_index is not None else build_name_index()
+
+
+def load_landmark_index(directory, count):
+    """
+    Load the landmark index for the compact `graph`, precomputing and
+    saving it if there is no up-to-date index with `count` landmarks.
+    """
+    global landmark_index
+    if not count:
+        return
+    landmark_index = load_landmarks(directory, graph)
+    if landmark_index is None or len(landmark_index.landmarks) != count:
+        landmark_index = LandmarkIndex.build(graph, count)
+        save_landmarks(directory, landmark_index)
+
+
+def load_data_from_snapshot(directory):
+    """
+    Load data from a binary snapshot into memory. `people`, `movies` and
+    `names` become read-only mappings served from the snapshot's string
+    table. Returns False if there is no usable snapshot.
+    """
+    global graph, people, movies, names
+    loaded = load_snapshot(directory)
+    if loaded is None:
+        return False
+    graph, people, movies, names = loaded
+    return True
+
+
+def load_compact_stars(directory, workers, rejected):
+    """
+    Load stars.csv straight into the compact `graph`, interning rows in
+    the reader's workers, and count rejected rows in `rejected`. Returns
+    the number of stars loaded.
+    """
+    global graph
+    person_ids = list(people)
+    movie_ids = list(movies)
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+    keys, movie_keys, star_rejected = read_stars(
+        directory, person_index, movie_index, workers
+    )
+    rejected.update(star_rejected)
+    graph = Graph.from_keys(person_ids, movie_ids, keys, movie_keys)
+    return len(keys)
 
 
 def main():
@@ -59,8 +211,11 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    report = load_data(directory, compact=True, workers=default_workers(directory))
     print("Data loaded.")
+    rejected = sum(report["rejected"].values())
+    if rejected:
+        print(f"Rejected {rejected} rows: {report['rejected']}")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +224,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = bidirectional_shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -91,6 +246,10 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    if graph is not None:
+        return graph.shortest_path(source, target)
+    if source == target:
+        return []
 
     people_visited = set()
     movies_visited = set()
@@ -107,7 +266,8 @@ def shortest_path(source, target):
         movies_visited.add(node.action)
         neighbours = neighbors_for_person(node.state)
         for movie, person in neighbours:
-            if not (movie in movies_visited or person in people_visited):
+            if not (movie in movies_visited or person in people_visited
+                    or queue.contains_state(person)):
                 if person == target:
                     return extract_path_from_node(Node(person, node, movie))
                 queue.add(Node(person, node, movie))
@@ -115,6 +275,187 @@ def shortest_path(source, target):
     return None
 
 
+def cached_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, reusing search trees
+    kept in `path_cache` by earlier queries.
+
+    If no possible path, returns None.
+    """
+    return path_cache.shortest_path(source, target)
+
+
+def landmark_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using A* search guided by
+    `landmark_index` when one is loaded.
+
+    If no possible path, returns None.
+    """
+    if landmark_index is None:
+        return bidirectional_shortest_path(source, target)
+    return landmark_index.shortest_path(source, target)
+
+
+def shortest_paths(source, targets):
+    """
+    Returns a dictionary mapping each of `targets` to the shortest list
+    of (movie_id, person_id) pairs connecting the source to it, or None
+    if it is not connected, using a single breadth-first search.
+    """
+    found = multi_source_shortest_paths([source], targets)
+    return {
+        target: None if found[target] is None else found[target][1]
+        for target in targets
+    }
+
+
+def all_pairs_shortest_paths(sources, targets):
+    """
+    Returns a dictionary mapping each source to the result of
+    `shortest_paths(source, targets)`.
+    """
+    return {source: shortest_paths(source, targets) for source in sources}
+
+
+def multi_source_shortest_paths(sources, targets):
+    """
+    Runs a single breadth-first search from all `sources` at once,
+    stopping as soon as every target has been found.
+
+    Returns a dictionary mapping each of `targets` to a (source, path)
+    tuple, where source is the nearest of `sources` and path is a list
+    of (movie_id, person_id) pairs, or to None if it is not connected.
+    """
+    if graph is not None:
+        found = graph.shortest_paths(sources, targets)
+        return {target: found.get(target) for target in targets}
+
+    remaining = set(targets)
+    found = {}
+
+    # Maps person_ids to the (movie_id, person_id) edge they were reached by
+    parents = {}
+    frontier = []
+    for source in sources:
+        if source not in parents:
+            parents[source] = None
+            frontier.append(source)
+            if source in remaining:
+                remaining.discard(source)
+                found[source] = (source, [])
+
+    while frontier and remaining:
+        next_frontier = []
+        for person in frontier:
+            for movie, neighbour in neighbors_for_person(person):
+                if neighbour in parents:
+                    continue
+                parents[neighbour] = (movie, person)
+                next_frontier.append(neighbour)
+                if neighbour in remaining:
+                    remaining.discard(neighbour)
+                    found[neighbour] = extract_path_from_parents(
+                        neighbour, parents
+                    )
+        frontier = next_frontier
+
+    return {target: found.get(target) for target in targets}
+
+
+def extract_path_from_parents(person, parents):
+    """
+    Follows a map of parent edges back from person to the source it
+    was reached from, returning a (source, path) tuple.
+    """
+    path = []
+    while parents[person] is not None:
+        movie, parent = parents[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+    return person, path
+
+
+def bidirectional_shortest_path(source, target, deadline=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching from both ends.
+
+    Frontiers are grown one full layer at a time from whichever side
+    is currently smaller; the search stops after the first layer in
+    which the two sides meet.
+
+    If no possible path, returns None. Raises SearchTimeout if `deadline`,
+    a time.time() value, passes before the search is done.
+    """
+    if source == target:
+        return []
+
+    # Maps person_ids to the (movie_id, person_id) edge they were reached by
+    forward_parents = {source: None}
+    backward_parents = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        if expand_forward:
+            frontier, parents, others = (
+                forward_frontier, forward_parents, backward_parents
+            )
+        else:
+            frontier, parents, others = (
+                backward_frontier, backward_parents, forward_parents
+            )
+
+        next_frontier = []
+        meeting = None
+        for person in frontier:
+            if deadline is not None and time.time() > deadline:
+                raise SearchTimeout
+            for movie, neighbour in neighbors_for_person(person):
+                if neighbour in parents:
+                    continue
+                parents[neighbour] = (movie, person)
+                next_frontier.append(neighbour)
+                if meeting is None and neighbour in others:
+                    meeting = neighbour
+
+        if meeting is not None:
+            return join_paths(meeting, forward_parents, backward_parents)
+
+        if expand_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def join_paths(meeting, forward_parents, backward_parents):
+    """
+    Joins the two halves of a bidirectional search at the meeting person
+    into a single list of (movie_id, person_id) pairs.
+    """
+    path = []
+    person = meeting
+    while forward_parents[person] is not None:
+        movie, parent = forward_parents[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+
+    person = meeting
+    while backward_parents[person] is not None:
+        movie, child = backward_parents[person]
+        path.append((movie, child))
+        person = child
+    return path
+
+
 def extract_path_from_node(node):
     path = []
     while node.action is not None:
@@ -124,11 +465,18 @@ def extract_path_from_node(node):
     return path
 
 
-def person_id_for_name(name):
+def person_id_for_name(name, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Ambiguities are resolved by prompting if `interactive` is True, and
+    otherwise by picking the person who starred in the most movies.
     """
+    if not interactive:
+        candidates = loaded_name_index().exact(name)
+        return candidates[0][0] if candidates else None
+
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
@@ -150,11 +498,21 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def search_names(query, limit=10):
+    """
+    Returns up to `limit` (person_id, name, birth) candidates for a
+    possibly partial or misspelt name, best matches first.
+    """
+    return loaded_name_index().search(query, limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
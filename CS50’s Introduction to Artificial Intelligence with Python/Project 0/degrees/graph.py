@@ -0,0 +1,230 @@
+from array import array
+from collections import Counter
+
+
+class Graph():
+    """
+    Compact, integer-indexed view of the people/movies star graph.
+
+    Person and movie IDs are interned to dense integers. The bipartite
+    graph is stored twice in CSR form: for person `p` the movies they
+    starred in are `person_movies[person_offsets[p]:person_offsets[p + 1]]`,
+    and for movie `m` its stars are
+    `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+    """
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies, movie_offsets, movie_stars):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_index = {pid: i for i, pid in enumerate(person_ids)}
+        self.movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        # Number of people expanded by searches, for benchmarking
+        self.expanded = 0
+
+    @classmethod
+    def from_edges(cls, person_ids, movie_ids, edges):
+        """
+        Builds a graph from lists of person and movie IDs and an iterable
+        of (person_index, movie_index) star edges.
+        """
+        person_count = array("l", bytes(array("l").itemsize * len(person_ids)))
+        movie_count = array("l", bytes(array("l").itemsize * len(movie_ids)))
+        edges = list(edges)
+        for p, m in edges:
+            person_count[p] += 1
+            movie_count[m] += 1
+
+        person_offsets = cls.offsets_from_counts(person_count)
+        movie_offsets = cls.offsets_from_counts(movie_count)
+
+        person_movies = array("l", bytes(array("l").itemsize * len(edges)))
+        movie_stars = array("l", bytes(array("l").itemsize * len(edges)))
+        person_fill = array("l", person_offsets[:-1])
+        movie_fill = array("l", movie_offsets[:-1])
+        for p, m in edges:
+            person_movies[person_fill[p]] = m
+            person_fill[p] += 1
+            movie_stars[movie_fill[m]] = p
+            movie_fill[m] += 1
+
+        return cls(person_ids, movie_ids,
+                   person_offsets, person_movies, movie_offsets, movie_stars)
+
+    @classmethod
+    def from_keys(cls, person_ids, movie_ids, keys, movie_keys):
+        """
+        Builds a graph from sorted lists of distinct star keys, `keys` as
+        person_index * len(movie_ids) + movie_index and `movie_keys` as
+        movie_index * len(person_ids) + person_index. The CSR arrays are
+        split out of the keys with list comprehensions rather than filled
+        edge by edge.
+        """
+        people = len(person_ids)
+        movie_count = len(movie_ids)
+        person_movies = array("l", [key % movie_count for key in keys])
+        person_offsets = cls.offsets_from_owners(
+            [key // movie_count for key in keys], people
+        )
+        movie_stars = array("l", [key % people for key in movie_keys])
+        movie_offsets = cls.offsets_from_owners(
+            [key // people for key in movie_keys], movie_count
+        )
+        return cls(person_ids, movie_ids,
+                   person_offsets, person_movies, movie_offsets, movie_stars)
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Builds a graph from the `people` and `movies` dictionaries
+        produced by `degrees.load_data`.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        edges = [
+            (p, movie_index[movie_id])
+            for p, person_id in enumerate(person_ids)
+            for movie_id in people[person_id]["movies"]
+        ]
+        return cls.from_edges(person_ids, movie_ids, edges)
+
+    @staticmethod
+    def offsets_from_counts(counts):
+        offsets = array("l", [0])
+        total = 0
+        for count in counts:
+            total += count
+            offsets.append(total)
+        return offsets
+
+    @classmethod
+    def offsets_from_owners(cls, owners, count):
+        """
+        Returns CSR offsets for `count` rows from the row each entry, in
+        row order, belongs to.
+        """
+        counts = Counter(owners)
+        return cls.offsets_from_counts([counts[row] for row in range(count)])
+
+    def movies_of(self, p):
+        """Returns the movie indices person index `p` starred in."""
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def stars_of(self, m):
+        """Returns the person indices who starred in movie index `m`."""
+        return self.movie_stars[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def neighbor_indices(self, p):
+        """
+        Yields (movie_index, person_index) pairs for people
+        who starred with person index `p`.
+        """
+        person_offsets = self.person_offsets
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        for i in range(person_offsets[p], person_offsets[p + 1]):
+            m = self.person_movies[i]
+            for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                yield m, movie_stars[j]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        p = self.person_index[person_id]
+        return {
+            (self.movie_ids[m], self.person_ids[q])
+            for m, q in self.neighbor_indices(p)
+        }
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        found = self.shortest_paths([source], [target])
+        return found[target][1] if target in found else None
+
+    def shortest_paths(self, sources, targets):
+        """
+        Runs a single breadth-first search from all `sources` at once,
+        stopping as soon as every target has been reached.
+
+        Returns a dictionary mapping each reachable target to a
+        (source, path) tuple, where source is the nearest of `sources`
+        and path is a list of (movie_id, person_id) pairs. Targets not
+        in the graph are never reached.
+        """
+        person_index = self.person_index
+        remaining = {person_index[target] for target in targets
+                     if target in person_index}
+        found = {}
+
+        # parent_person[p] is the person index p was reached from, or -1
+        parent_person = array("l", [-1]) * len(self.person_ids)
+        parent_movie = array("l", [-1]) * len(self.person_ids)
+        movie_seen = bytearray(len(self.movie_ids))
+
+        frontier = []
+        for source in sources:
+            s = person_index[source]
+            if parent_person[s] == -1:
+                parent_person[s] = s
+                frontier.append(s)
+        for s in frontier:
+            if s in remaining:
+                remaining.discard(s)
+                found[self.person_ids[s]] = (self.person_ids[s], [])
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        while frontier and remaining:
+            self.expanded += len(frontier)
+            next_frontier = []
+            for p in frontier:
+                for i in range(person_offsets[p], person_offsets[p + 1]):
+                    m = person_movies[i]
+                    if movie_seen[m]:
+                        continue
+                    movie_seen[m] = 1
+                    for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                        q = movie_stars[j]
+                        if parent_person[q] != -1:
+                            continue
+                        parent_person[q] = p
+                        parent_movie[q] = m
+                        next_frontier.append(q)
+                        if q in remaining:
+                            remaining.discard(q)
+                            found[self.person_ids[q]] = self.extract_path(
+                                q, parent_person, parent_movie
+                            )
+                            if not remaining:
+                                return found
+            frontier = next_frontier
+
+        return found
+
+    def extract_path(self, t, parent_person, parent_movie):
+        """
+        Follows parent links back from person index `t` to the source
+        it was reached from, returning a (source_id, path) tuple.
+        """
+        path = []
+        p = t
+        while parent_person[p] != p:
+            path.append((self.movie_ids[parent_movie[p]], self.person_ids[p]))
+            p = parent_person[p]
+        path.reverse()
+        return self.person_ids[p], path
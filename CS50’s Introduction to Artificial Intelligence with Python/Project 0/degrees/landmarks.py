@@ -0,0 +1,349 @@
+"""
+Landmark distance index for goal-directed search on a compact `Graph`.
+
+Breadth-first distances from a handful of high-degree landmark people give
+a lower bound on the distance between any two people through the triangle
+inequality, |d(L, p) - d(L, t)| <= d(p, t). Those bounds drive an A* search
+(the ALT algorithm), and connected-component labels answer unreachable
+queries without searching at all.
+"""
+
+import heapq
+import json
+import os
+import sys
+from array import array
+
+from cache import reverse_path
+from snapshot import source_stamps
+
+MAGIC = b"DEGREES-LANDMARKS"
+VERSION = 1
+FILENAME = "degrees.landmarks"
+
+# Distance recorded for people a landmark cannot reach
+UNREACHABLE = 0xFFFF
+
+
+def landmarks_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def bfs_distances(graph, source):
+    """
+    Returns an array of degrees of separation from person index `source`
+    to every person index, with UNREACHABLE for other components.
+    """
+    distances = array("H", [UNREACHABLE]) * len(graph.person_ids)
+    movie_seen = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for p in frontier:
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+                if movie_seen[m]:
+                    continue
+                movie_seen[m] = 1
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_stars[j]
+                    if distances[q] == UNREACHABLE:
+                        distances[q] = depth
+                        next_frontier.append(q)
+        frontier = next_frontier
+    return distances
+
+
+def component_labels(graph):
+    """
+    Returns an array labelling each person index with the index of the
+    first person in its connected component.
+    """
+    labels = array("l", [-1]) * len(graph.person_ids)
+    movie_seen = bytearray(len(graph.movie_ids))
+
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+
+    for start in range(len(graph.person_ids)):
+        if labels[start] != -1:
+            continue
+        labels[start] = start
+        stack = [start]
+        while stack:
+            p = stack.pop()
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+                if movie_seen[m]:
+                    continue
+                movie_seen[m] = 1
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_stars[j]
+                    if labels[q] == -1:
+                        labels[q] = start
+                        stack.append(q)
+    return labels
+
+
+def co_stars(graph, p):
+    """
+    Returns the number of stars, counted once per movie, in the movies
+    person index `p` starred in.
+    """
+    movie_offsets = graph.movie_offsets
+    return sum(movie_offsets[m + 1] - movie_offsets[m] for m in graph.movies_of(p))
+
+
+def push(heap, waiting, key, p):
+    """
+    Adds person index `p` to the people waiting with `key`, pushing the
+    key onto the heap if none were. Returns the list of waiting people.
+    """
+    people = waiting.get(key)
+    if people is None:
+        people = waiting[key] = []
+        heapq.heappush(heap, key)
+    people.append(p)
+    return people
+
+
+class LandmarkIndex():
+
+    def __init__(self, graph, landmarks, distances, components):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+        self.components = components
+
+    @classmethod
+    def build(cls, graph, count=8):
+        """
+        Precomputes distances from the `count` people who share movies
+        with the most co-stars.
+        """
+        people = range(len(graph.person_ids))
+        landmarks = sorted(people, key=lambda p: co_stars(graph, p),
+                           reverse=True)[:count]
+        distances = [bfs_distances(graph, landmark) for landmark in landmarks]
+        return cls(graph, landmarks, distances, component_labels(graph))
+
+    def connected(self, source, target):
+        """Returns True if two person_ids are in the same component."""
+        index = self.graph.person_index
+        return self.components[index[source]] == self.components[index[target]]
+
+    def lower_bound(self, p, t):
+        """
+        Returns a lower bound on the degrees of separation between
+        person indices `p` and `t`.
+        """
+        bound = 0
+        for distances in self.distances:
+            dp = distances[p]
+            dt = distances[t]
+            if dp != UNREACHABLE and dt != UNREACHABLE:
+                bound = max(bound, abs(dp - dt))
+        return bound
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using A* search guided
+        by landmark lower bounds.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        s = graph.person_index[source]
+        t = graph.person_index[target]
+        if self.components[s] != self.components[t]:
+            return None
+
+        # Bounds are symmetric, so search from whichever end has fewer
+        # co-stars to scan
+        if co_stars(graph, t) < co_stars(graph, s):
+            return reverse_path(target, self.search(t, s))
+        return self.search(s, t)
+
+    def search(self, s, t):
+        """
+        Returns the shortest path from person index `s` to person index
+        `t` in the same component, as (movie_id, person_id) pairs.
+        """
+        graph = self.graph
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_stars = graph.movie_stars
+
+        # Landmarks reaching the target reach everyone in its component,
+        # paired with their distance to the target
+        targets = [(distances, distances[t]) for distances in self.distances
+                   if distances[t] != UNREACHABLE]
+
+        # cost[p] is the degrees of separation p was reached at, and
+        # parent_person[p] and parent_movie[p] the edge it was reached by,
+        # as `Graph.extract_path` expects
+        people = len(graph.person_ids)
+        cost = array("H", [UNREACHABLE]) * people
+        parent_person = array("l", [-1]) * people
+        parent_movie = array("l", [-1]) * people
+        # Lower bounds to the target, computed when a person is first
+        # popped. People are pushed with their parent's bound less one,
+        # which is never more, and pushed again once theirs is known.
+        bounds = array("H", [UNREACHABLE]) * people
+        # Cost of the person each movie was expanded from. Its stars are
+        # all within one degree of each other, so a movie is expanded
+        # again only from a cheaper star, at most once more.
+        movie_cost = array("H", [UNREACHABLE]) * len(graph.movie_ids)
+
+        # Priorities are small integers, so the heap holds each distinct
+        # (f, -g) key once and `waiting` the people pushed with it. Ties
+        # on f are broken towards deeper people.
+        heap = [(0, 0)]
+        waiting = {(0, 0): [s]}
+        cost[s] = 0
+        parent_person[s] = s
+        while heap:
+            key = heap[0]
+            people_waiting = waiting[key]
+            p = people_waiting.pop()
+            if not people_waiting:
+                heapq.heappop(heap)
+                del waiting[key]
+            if p == t:
+                break
+            f, negative_cost = key
+            g = -negative_cost
+            if g > cost[p]:
+                continue
+            if bounds[p] == UNREACHABLE:
+                bounds[p] = max([abs(distances[p] - d) for distances, d in targets],
+                                default=0)
+                if g + bounds[p] > f:
+                    push(heap, waiting, (g + bounds[p], negative_cost), p)
+                    continue
+            graph.expanded += 1
+            next_key = (g + 1 + max(bounds[p] - 1, 0), -(g + 1))
+            reached = waiting.get(next_key)
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+                if movie_cost[m] <= g:
+                    continue
+                movie_cost[m] = g
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_stars[j]
+                    if cost[q] <= g + 1:
+                        continue
+                    cost[q] = g + 1
+                    parent_person[q] = p
+                    parent_movie[q] = m
+                    # Popped keys never exceed the target's distance, so
+                    # reaching it within the current key is optimal
+                    if q == t and g + 1 <= f:
+                        return graph.extract_path(t, parent_person, parent_movie)[1]
+                    if reached is None:
+                        reached = push(heap, waiting, next_key, q)
+                    else:
+                        reached.append(q)
+        else:
+            return None
+        return graph.extract_path(t, parent_person, parent_movie)[1]
+
+
+def save_landmarks(directory, index):
+    """
+    Writes a landmark index next to the dataset's CSV files.
+    Returns True if the index was written.
+    """
+    landmarks = array("l", index.landmarks)
+    components = index.components
+    if not isinstance(components, array):
+        components = array("l", components)
+    chunks = [landmarks.tobytes(), components.tobytes()]
+    chunks.extend(
+        distances.tobytes() if isinstance(distances, array)
+        else array("H", distances).tobytes()
+        for distances in index.distances
+    )
+    header = json.dumps({
+        "version": VERSION,
+        "itemsize": array("l").itemsize,
+        "byteorder": sys.byteorder,
+        "sources": source_stamps(directory),
+        "people": len(index.graph.person_ids),
+        "landmarks": len(index.landmarks),
+    }).encode("utf-8")
+
+    path = landmarks_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def load_landmarks(directory, graph):
+    """
+    Reads a landmark index for `graph`, or returns None if there is
+    none or it does not match the dataset.
+    """
+    try:
+        with open(landmarks_path(directory), "rb") as f:
+            data = f.read()
+        start = len(MAGIC) + 8
+        if data[:len(MAGIC)] != MAGIC:
+            return None
+        header_length = int.from_bytes(data[len(MAGIC):start], "little")
+        header = json.loads(data[start:start + header_length])
+        if (header["version"] != VERSION
+                or header["itemsize"] != array("l").itemsize
+                or header["byteorder"] != sys.byteorder
+                or header["sources"] != source_stamps(directory)
+                or header["people"] != len(graph.person_ids)):
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+
+    people = header["people"]
+    count = header["landmarks"]
+    offset = start + header_length
+
+    def read(typecode, length):
+        nonlocal offset
+        values = array(typecode)
+        end = offset + values.itemsize * length
+        values.frombytes(data[offset:end])
+        offset = end
+        return values
+
+    expected = (offset + array("l").itemsize * (count + people)
+                + array("H").itemsize * count * people)
+    if len(data) != expected:
+        return None
+    landmarks = list(read("l", count))
+    components = read("l", people)
+    distances = [read("H", people) for _ in range(count)]
+    return LandmarkIndex(graph, landmarks, distances, components)
@@ -0,0 +1,245 @@
+"""
+Streaming, optionally parallel reader for the degrees CSV files.
+
+Each file is split into byte ranges that end on line boundaries, and the
+ranges are parsed independently, in a process pool when `workers` > 1.
+Rows that do not have the expected number of fields are counted as
+rejected instead of being dropped silently. Fields must not contain
+newlines, which holds for the IMDb exports this project reads.
+
+`read_stars` also interns star rows in the workers, which turn them into
+sorted integer edge keys and send them back as packed arrays rather than
+as tuples of strings.
+"""
+
+import csv
+import io
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+# Bytes of CSV parsed per task
+CHUNK_SIZE = 4 * 1024 * 1024
+
+TABLES = {
+    "people": ("people.csv", ("id", "name", "birth")),
+    "movies": ("movies.csv", ("id", "title", "year")),
+    "stars": ("stars.csv", ("person_id", "movie_id")),
+}
+
+# Maps person_ids and movie_ids to graph indices in a `read_stars` worker
+person_index = None
+movie_index = None
+
+
+def chunk_ranges(path, chunk_size=CHUNK_SIZE):
+    """
+    Returns the header line of a CSV file and a list of (start, end)
+    byte ranges covering the rest of it, each ending on a line boundary.
+    """
+    ranges = []
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        while start < size:
+            f.seek(min(start + chunk_size, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header.decode("utf-8-sig"), ranges
+
+
+def parse_chunk(path, start, end, positions):
+    """
+    Parses the rows in a byte range of a CSV file, keeping the fields
+    at `positions`. Returns a (rows, rejected) tuple.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    width = max(positions) + 1
+    if len(positions) == 1:
+        # itemgetter returns a bare field, not a tuple, for one position
+        def pick(fields, position=positions[0]):
+            return (fields[position],)
+    else:
+        pick = itemgetter(*positions)
+    rows = []
+    rejected = 0
+    for fields in csv.reader(io.StringIO(data.decode("utf-8"))):
+        if not fields:
+            continue
+        if len(fields) < width:
+            rejected += 1
+            continue
+        rows.append(pick(fields))
+    return rows, rejected
+
+
+def set_indices(people, movies):
+    """Sets the indices star rows are interned with in this process."""
+    global person_index, movie_index
+    person_index = people
+    movie_index = movies
+
+
+def intern_chunk(path, start, end, positions):
+    """
+    Parses the star rows in a byte range of a CSV file and interns them.
+    Returns a (keys, movie_keys, rows, rejected, unknown_people,
+    unknown_movies) tuple, where keys holds the distinct stars as
+    person_index * len(movie_index) + movie_index and movie_keys the
+    same stars as movie_index * len(person_index) + person_index, both
+    sorted, and rows counts the stars interned before removing duplicates.
+    """
+    rows, rejected = parse_chunk(path, start, end, positions)
+    people = len(person_index)
+    movie_count = len(movie_index)
+    keys = []
+    movie_keys = []
+    unknown_people = 0
+    unknown_movies = 0
+    for person_id, movie_id in rows:
+        p = person_index.get(person_id)
+        if p is None:
+            unknown_people += 1
+            continue
+        m = movie_index.get(movie_id)
+        if m is None:
+            unknown_movies += 1
+            continue
+        keys.append(p * movie_count + m)
+        movie_keys.append(m * people + p)
+    interned = len(keys)
+    return (array("q", sorted(set(keys))), array("q", sorted(set(movie_keys))),
+            interned, rejected, unknown_people, unknown_movies)
+
+
+def column_positions(path, header, columns):
+    fieldnames = next(csv.reader([header]))
+    try:
+        return [fieldnames.index(column) for column in columns]
+    except ValueError:
+        raise ValueError(f"{path} must have columns {', '.join(columns)}")
+
+
+def map_chunks(function, path, ranges, positions, executor=None):
+    """Returns `function` applied to each byte range, on `executor` if given."""
+    if executor is None:
+        return [function(path, start, end, positions) for start, end in ranges]
+    futures = [executor.submit(function, path, start, end, positions)
+               for start, end in ranges]
+    return [future.result() for future in futures]
+
+
+def read_table(path, columns, executor=None, chunk_size=CHUNK_SIZE):
+    """
+    Reads `columns` from a CSV file, parsing chunks on `executor` if given.
+    Returns a (rows, rejected) tuple, with rows in file order.
+    """
+    header, ranges = chunk_ranges(path, chunk_size)
+    positions = column_positions(path, header, columns)
+    results = map_chunks(parse_chunk, path, ranges, positions, executor)
+
+    rows = []
+    rejected = 0
+    for chunk_rows, chunk_rejected in results:
+        rows.extend(chunk_rows)
+        rejected += chunk_rejected
+    return rows, rejected
+
+
+def read_dataset(directory, workers=1, chunk_size=CHUNK_SIZE, tables=TABLES):
+    """
+    Reads people.csv, movies.csv and stars.csv, or only the files of the
+    given `tables`, from `directory`.
+
+    Returns a (tables, rejected) tuple, where tables maps "people",
+    "movies" and "stars" to lists of row tuples, and rejected maps
+    each file name to the number of malformed rows it contained.
+    """
+    rows = {}
+    rejected = {}
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        for table in tables:
+            filename, columns = TABLES[table]
+            rows[table], rejected[filename] = read_table(
+                os.path.join(directory, filename), columns, executor, chunk_size
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return rows, rejected
+
+
+def read_stars(directory, people, movies, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Reads stars.csv from `directory`, interning rows with `people` and
+    `movies`, dictionaries mapping person_ids and movie_ids to indices.
+    Each worker receives the dictionaries once, when it starts.
+
+    Returns a (keys, movie_keys, rejected) tuple. keys is a sorted list
+    of the distinct stars as person_index * len(movies) + movie_index,
+    movie_keys the same stars as movie_index * len(people) + person_index,
+    and rejected counts malformed rows, rows naming unknown people or
+    movies, and duplicate rows.
+    """
+    path = os.path.join(directory, TABLES["stars"][0])
+    header, ranges = chunk_ranges(path, chunk_size)
+    positions = column_positions(path, header, TABLES["stars"][1])
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(
+            workers, initializer=set_indices, initargs=(people, movies)
+        )
+        try:
+            results = map_chunks(intern_chunk, path, ranges, positions, executor)
+        finally:
+            executor.shutdown()
+    else:
+        set_indices(people, movies)
+        try:
+            results = map_chunks(intern_chunk, path, ranges, positions)
+        finally:
+            set_indices(None, None)
+
+    # Each chunk's keys are sorted, so sorting them all merges the runs,
+    # and duplicates across chunks are then adjacent
+    keys = array("q")
+    movie_keys = array("q")
+    interned = 0
+    rejected = {TABLES["stars"][0]: 0, "unknown person": 0,
+                "unknown movie": 0, "duplicate star": 0}
+    for (chunk_keys, chunk_movie_keys, chunk_interned,
+         malformed, unknown_people, unknown_movies) in results:
+        keys.extend(chunk_keys)
+        movie_keys.extend(chunk_movie_keys)
+        interned += chunk_interned
+        rejected[TABLES["stars"][0]] += malformed
+        rejected["unknown person"] += unknown_people
+        rejected["unknown movie"] += unknown_movies
+    keys = list(dict.fromkeys(sorted(keys)))
+    movie_keys = list(dict.fromkeys(sorted(movie_keys)))
+    rejected["duplicate star"] = interned - len(keys)
+    return keys, movie_keys, rejected
+
+
+def default_workers(directory, chunk_size=CHUNK_SIZE):
+    """
+    Returns how many worker processes are worth starting to read the
+    dataset in `directory`: one per CPU, but no more than its largest
+    file has chunks, so small datasets are read without a pool.
+    """
+    chunks = 1
+    for filename, _ in TABLES.values():
+        try:
+            size = os.path.getsize(os.path.join(directory, filename))
+        except OSError:
+            continue
+        chunks = max(chunks, -(-size // chunk_size))
+    return min(os.cpu_count() or 1, chunks)
@@ -0,0 +1,165 @@
+"""
+Prefix and typo-tolerant lookup of people by name.
+
+Names are kept lowercased in a sorted array for prefix search with
+`bisect`, and every distinct name is split into character trigrams so
+misspelt queries can be matched by the trigrams they share with a name,
+then ranked by edit distance.
+"""
+
+from array import array
+from bisect import bisect_left
+
+# Number of trigram matches re-ranked by edit distance in fuzzy lookups
+FUZZY_POOL = 20
+
+
+def trigrams(text):
+    """Returns the set of character trigrams of text, padded at both ends."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, bound=None):
+    """
+    Returns the Levenshtein distance between two strings. If `bound` is
+    given, stops early and returns bound + 1 once the distance must
+    exceed it.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        if bound is not None and min(current) > bound:
+            return bound + 1
+        previous = current
+    return previous[-1]
+
+
+class NameIndex():
+
+    def __init__(self, people, popularity=None):
+        """
+        Builds an index over `people`, a dictionary mapping person_ids to
+        dictionaries with a name and birth. `popularity`, if given, is a
+        function of a person_id used to rank people sharing a name.
+        """
+        self.people = people
+        self.popularity = popularity or (lambda person_id: 0)
+
+        entries = sorted((person["name"].lower(), person_id)
+                         for person_id, person in people.items())
+        self.keys = [name for name, _ in entries]
+        self.person_ids = [person_id for _, person_id in entries]
+
+        # Distinct names, with the first position of each in `keys`
+        self.names = []
+        self.starts = array("l")
+        for i, name in enumerate(self.keys):
+            if not self.names or self.names[-1] != name:
+                self.names.append(name)
+                self.starts.append(i)
+        self.starts.append(len(self.keys))
+
+        postings = {}
+        for n, name in enumerate(self.names):
+            for gram in trigrams(name):
+                postings.setdefault(gram, array("l")).append(n)
+        self.postings = postings
+
+    def candidate(self, person_id):
+        person = self.people[person_id]
+        return person_id, person["name"], person["birth"]
+
+    def rank(self, person_ids):
+        return sorted(person_ids,
+                      key=lambda person_id: (-self.popularity(person_id),
+                                             person_id))
+
+    def people_named(self, n):
+        return self.person_ids[self.starts[n]:self.starts[n + 1]]
+
+    def exact(self, name):
+        """
+        Returns (person_id, name, birth) candidates whose name matches
+        exactly, ignoring case, most popular first.
+        """
+        key = name.lower()
+        i = bisect_left(self.names, key)
+        if i == len(self.names) or self.names[i] != key:
+            return []
+        return [self.candidate(person_id)
+                for person_id in self.rank(self.people_named(i))]
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` (person_id, name, birth) candidates whose
+        name starts with `prefix`, ignoring case, in name order.
+        """
+        key = prefix.lower()
+        candidates = []
+        i = bisect_left(self.names, key)
+        while (i < len(self.names) and self.names[i].startswith(key)
+               and len(candidates) < limit):
+            for person_id in self.rank(self.people_named(i)):
+                candidates.append(self.candidate(person_id))
+            i += 1
+        return candidates[:limit]
+
+    def fuzzy(self, name, limit=10, max_distance=None):
+        """
+        Returns up to `limit` (person_id, name, birth) candidates whose
+        name is close to `name`, closest first. Names more than
+        `max_distance` edits away are left out; the default allows one
+        edit for every four characters.
+        """
+        key = name.lower()
+        if max_distance is None:
+            max_distance = max(1, len(key) // 4)
+
+        # Each edit changes at most three trigrams, so a close enough name
+        # must share at least one of the query's 3 * max_distance + 1
+        # rarest trigrams; only those posting lists are scanned
+        grams = sorted(trigrams(key),
+                       key=lambda gram: len(self.postings.get(gram, ())))
+        shared = {}
+        for gram in grams[:3 * max_distance + 1]:
+            for n in self.postings.get(gram, ()):
+                shared[n] = shared.get(n, 0) + 1
+        pool = sorted(shared, key=lambda n: -shared[n])[:FUZZY_POOL]
+
+        scored = []
+        for n in pool:
+            if abs(len(self.names[n]) - len(key)) > max_distance:
+                continue
+            distance = edit_distance(key, self.names[n], max_distance)
+            if distance <= max_distance:
+                scored.append((distance, -shared[n], self.names[n], n))
+        scored.sort()
+
+        candidates = []
+        for _, _, _, n in scored:
+            for person_id in self.rank(self.people_named(n)):
+                candidates.append(self.candidate(person_id))
+        return candidates[:limit]
+
+    def search(self, name, limit=10):
+        """
+        Returns up to `limit` ranked (person_id, name, birth) candidates
+        for `name`: exact matches first, then prefix and fuzzy matches.
+        """
+        candidates = self.exact(name)
+        seen = {candidate[0] for candidate in candidates}
+        for lookup in (self.prefix, self.fuzzy):
+            if len(candidates) >= limit:
+                break
+            for candidate in lookup(name, limit):
+                if candidate[0] not in seen:
+                    seen.add(candidate[0])
+                    candidates.append(candidate)
+        return candidates[:limit]
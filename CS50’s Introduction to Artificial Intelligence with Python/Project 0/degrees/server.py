@@ -0,0 +1,179 @@
+"""
+Long-running degrees query server.
+
+The dataset is loaded once in compact form, from its binary snapshot when
+possible, and queries are answered by a pool of worker processes. Workers
+are forked from the loaded server where the platform allows, and otherwise
+load the same snapshot, so the graph's arrays are shared read-only through
+the page cache instead of being copied per worker.
+
+The protocol is one JSON object per line in each direction. A request
+
+    {"source": "Kevin Bacon", "target": "158"}
+
+names each person by IMDB id or by name, and is answered with
+
+    {"degrees": 1, "path": [["112384", "158"]]}
+
+where path holds (movie_id, person_id) pairs and is null if the people are
+not connected, or with {"error": "..."} if the query failed or timed out.
+
+Usage: python server.py [directory] [--port PORT] [--workers N] [--timeout S]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+from loader import default_workers
+
+# Seconds the server waits past a query's deadline for its worker to report
+TIMEOUT_GRACE = 1.0
+
+
+def load_worker(directory):
+    """Loads the dataset in a worker process unless it was inherited."""
+    if degrees.graph is None:
+        degrees.load_data(directory, compact=True)
+
+
+def resolve(person):
+    """Returns the person_id for an IMDB id or a name, or None."""
+    if person in degrees.people:
+        return person
+    return degrees.person_id_for_name(person, interactive=False)
+
+
+def answer(source, target, deadline=None):
+    """
+    Answers a single query in a worker process, giving up if `deadline`,
+    a time.time() value, passes first. The deadline is enforced here
+    rather than only by the server, so an abandoned query frees its
+    worker instead of running on.
+    """
+    if deadline is not None and time.time() > deadline:
+        return {"error": "query timed out before it started"}
+    source_id = resolve(source)
+    if source_id is None:
+        return {"error": f"person not found: {source}"}
+    target_id = resolve(target)
+    if target_id is None:
+        return {"error": f"person not found: {target}"}
+
+    try:
+        path = degrees.bidirectional_shortest_path(source_id, target_id, deadline)
+    except degrees.SearchTimeout:
+        return {"error": "query timed out"}
+    if path is None:
+        return {"degrees": None, "path": None}
+    return {"degrees": len(path), "path": path}
+
+
+class Server():
+
+    def __init__(self, directory, workers=None, timeout=5.0):
+        self.directory = directory
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.executor = None
+
+    def start_workers(self):
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "fork" if "fork" in methods else None
+        )
+        self.executor = ProcessPoolExecutor(
+            self.workers, mp_context=context,
+            initializer=load_worker, initargs=(self.directory,)
+        )
+
+    async def query(self, request):
+        try:
+            source = request["source"]
+            target = request["target"]
+        except (TypeError, KeyError):
+            return {"error": "request must have a source and a target"}
+        if not (isinstance(source, str) and isinstance(target, str)):
+            return {"error": "source and target must be strings"}
+
+        # Workers stop at the deadline themselves; the server waits a
+        # little longer so their own timeout error normally arrives first
+        loop = asyncio.get_running_loop()
+        deadline = time.time() + self.timeout
+        future = loop.run_in_executor(self.executor, answer, source, target,
+                                      deadline)
+        try:
+            return await asyncio.wait_for(future, self.timeout + TIMEOUT_GRACE)
+        except asyncio.TimeoutError:
+            return {"error": f"query timed out after {self.timeout} seconds"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {"error": "request must be a JSON object"}
+                else:
+                    response = await self.query(request)
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, ready=None):
+        """
+        Serves queries until cancelled. `ready`, if given, is called with
+        the bound port once the server is accepting connections.
+        """
+        self.start_workers()
+        try:
+            server = await asyncio.start_server(self.handle, host, port)
+            if ready is not None:
+                ready(server.sockets[0].getsockname()[1])
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees queries.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, compact=True,
+                      workers=default_workers(args.directory))
+    # Built before workers fork so they share it instead of each building one
+    degrees.build_name_index()
+    print("Data loaded.")
+
+    server = Server(args.directory, args.workers, args.timeout)
+    try:
+        asyncio.run(server.serve(
+            args.host, args.port,
+            lambda port: print(f"Serving on {args.host}:{port}")
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
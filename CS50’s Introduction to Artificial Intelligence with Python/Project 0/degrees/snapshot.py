@@ -0,0 +1,232 @@
+"""
+Binary snapshot of a loaded degrees dataset.
+
+A snapshot lives next to the CSV files and holds the compact graph's
+CSR arrays plus a string table of IDs, names, births, titles and years.
+The file is laid out as:
+
+    MAGIC | header length (8 bytes, little endian) | JSON header | payload
+
+The header records the format version, the platform's array item size and
+byte order, the size and mtime of each source CSV, the CRC-32 of the payload
+and where each section starts within the payload. Arrays are mapped back
+with `mmap`, so they are shared with the page cache instead of copied.
+People and movies are served from the string table columns by index, so
+no per-row dictionaries are built when a snapshot is loaded.
+"""
+
+import json
+import mmap
+import os
+import sys
+import zlib
+from array import array
+from collections.abc import Mapping
+
+from graph import Graph
+
+MAGIC = b"DEGREES-SNAPSHOT"
+VERSION = 1
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars")
+STRINGS = ("person_ids", "person_names", "person_births",
+           "movie_ids", "movie_titles", "movie_years")
+
+# Separates entries within a string table section
+SEPARATOR = "\0"
+
+
+class Records(Mapping):
+    """
+    Read-only mapping from IDs to record dictionaries, such as
+    {"name": ..., "birth": ..., "movies": None}, each built on access
+    from the columns of a string table.
+    """
+
+    def __init__(self, index, columns):
+        # Maps IDs to row numbers, and field names to columns or None
+        self.index = index
+        self.columns = columns
+
+    def __getitem__(self, key):
+        row = self.index[key]
+        return {field: None if column is None else column[row]
+                for field, column in self.columns.items()}
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+
+class Names(Mapping):
+    """
+    Read-only mapping from lowercased names to sets of person IDs, built
+    from the string table the first time it is used.
+    """
+
+    def __init__(self, person_ids, person_names):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.names = None
+
+    def built(self):
+        if self.names is None:
+            names = {}
+            for person_id, name in zip(self.person_ids, self.person_names):
+                names.setdefault(name.lower(), set()).add(person_id)
+            self.names = names
+        return self.names
+
+    def __getitem__(self, key):
+        return self.built()[key]
+
+    def __iter__(self):
+        return iter(self.built())
+
+    def __len__(self):
+        return len(self.built())
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_stamps(directory):
+    """
+    Returns the size and modification time of each source CSV,
+    used to invalidate stale snapshots.
+    """
+    stamps = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        stamps[name] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def save_snapshot(directory, graph, people, movies):
+    """
+    Writes a snapshot of `graph` and the people/movies metadata.
+    Returns True if the snapshot was written.
+    """
+    strings = {
+        "person_ids": graph.person_ids,
+        "person_names": [people[pid]["name"] for pid in graph.person_ids],
+        "person_births": [people[pid]["birth"] for pid in graph.person_ids],
+        "movie_ids": graph.movie_ids,
+        "movie_titles": [movies[mid]["title"] for mid in graph.movie_ids],
+        "movie_years": [movies[mid]["year"] for mid in graph.movie_ids],
+    }
+
+    sections = []
+    chunks = []
+    offset = 0
+    for name in ARRAYS:
+        data = getattr(graph, name)
+        if not isinstance(data, array):
+            data = array("l", data)
+        chunk = data.tobytes()
+        sections.append({"name": name, "offset": offset, "length": len(chunk)})
+        chunks.append(chunk)
+        offset += len(chunk)
+    for name in STRINGS:
+        chunk = SEPARATOR.join(strings[name]).encode("utf-8")
+        sections.append({"name": name, "offset": offset, "length": len(chunk),
+                         "count": len(strings[name])})
+        chunks.append(chunk)
+        offset += len(chunk)
+
+    payload = b"".join(chunks)
+    header = json.dumps({
+        "version": VERSION,
+        "itemsize": array("l").itemsize,
+        "byteorder": sys.byteorder,
+        "sources": source_stamps(directory),
+        "crc32": zlib.crc32(payload),
+        "sections": sections,
+    }).encode("utf-8")
+
+    path = snapshot_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            f.write(payload)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def load_snapshot(directory):
+    """
+    Maps a snapshot back into memory.
+
+    Returns a (graph, people, movies, names) tuple, in the form of the
+    `degrees` module's dictionaries but read from the string table, or None
+    if there is no snapshot or it is stale, corrupt or from another format
+    version.
+    """
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        if data[:len(MAGIC)] != MAGIC:
+            return None
+        start = len(MAGIC) + 8
+        header_length = int.from_bytes(data[len(MAGIC):start], "little")
+        header = json.loads(data[start:start + header_length])
+        if (header["version"] != VERSION
+                or header["itemsize"] != array("l").itemsize
+                or header["byteorder"] != sys.byteorder
+                or header["sources"] != source_stamps(directory)):
+            return None
+        payload = memoryview(data)[start + header_length:]
+        if zlib.crc32(payload) != header["crc32"]:
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+
+    sections = {}
+    counts = {}
+    for section in header["sections"]:
+        begin = section["offset"]
+        sections[section["name"]] = payload[begin:begin + section["length"]]
+        counts[section["name"]] = section.get("count")
+
+    arrays = {name: sections[name].cast("l") for name in ARRAYS}
+    strings = {}
+    for name in STRINGS:
+        text = bytes(sections[name]).decode("utf-8")
+        strings[name] = text.split(SEPARATOR) if counts[name] else []
+
+    graph = Graph(strings["person_ids"], strings["movie_ids"],
+                  arrays["person_offsets"], arrays["person_movies"],
+                  arrays["movie_offsets"], arrays["movie_stars"])
+    people = Records(graph.person_index, {
+        "name": strings["person_names"],
+        "birth": strings["person_births"],
+        "movies": None,
+    })
+    movies = Records(graph.movie_index, {
+        "title": strings["movie_titles"],
+        "year": strings["movie_years"],
+        "stars": None,
+    })
+    names = Names(strings["person_ids"], strings["person_names"])
+    return graph, people, movies, names
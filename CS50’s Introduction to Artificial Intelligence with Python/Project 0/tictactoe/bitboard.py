@@ -0,0 +1,166 @@
+"""
+Bitboard representation of a Tic Tac Toe board.
+
+Each player's marks are a 9-bit mask, with bit 3 * i + j set for a mark
+in row i, column j. Moves are made and undone in place by flipping a bit.
+"""
+
+import math
+
+import tictactoe
+from tictactoe import X, O, EMPTY
+
+FULL = 0b111111111
+
+# Masks of the three cells in each row, column and diagonal
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+]
+
+# Win masks through each cell, so a move only checks its own lines
+LINES_THROUGH = [[mask for mask in WIN_MASKS if mask >> cell & 1] for cell in range(9)]
+
+# Cells in the order search tries them: center, corners, then edges
+MOVE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+
+class Bitboard():
+
+    def __init__(self, x=0, o=0):
+        self.x = x
+        self.o = o
+        self.moves = bin(x).count("1") + bin(o).count("1")
+
+    def player(self):
+        """Returns player who has the next turn."""
+        return X if self.moves % 2 == 0 else O
+
+    def empty(self):
+        """Returns the mask of empty cells."""
+        return FULL & ~(self.x | self.o)
+
+    def actions(self):
+        """Returns the empty cells, in search order."""
+        empty = self.empty()
+        return [cell for cell in MOVE_ORDER if empty >> cell & 1]
+
+    def move(self, cell):
+        """Marks a cell for the player whose turn it is."""
+        if self.moves % 2 == 0:
+            self.x |= 1 << cell
+        else:
+            self.o |= 1 << cell
+        self.moves += 1
+
+    def undo(self, cell):
+        """Clears a cell marked by the last move."""
+        self.moves -= 1
+        if self.moves % 2 == 0:
+            self.x &= ~(1 << cell)
+        else:
+            self.o &= ~(1 << cell)
+
+    def wins(self, cell):
+        """Returns True if the mark on a cell completes a line."""
+        marks = self.x if self.x >> cell & 1 else self.o
+        for mask in LINES_THROUGH[cell]:
+            if marks & mask == mask:
+                return True
+        return False
+
+    def winner(self):
+        """Returns the winner of the game, if there is one."""
+        for mask in WIN_MASKS:
+            if self.x & mask == mask:
+                return X
+            if self.o & mask == mask:
+                return O
+        return EMPTY
+
+    def terminal(self):
+        """Returns True if game is over, False otherwise."""
+        return self.moves == 9 or self.winner() != EMPTY
+
+    def utility(self):
+        """Returns 1 if X has won the game, -1 if O has won, 0 otherwise."""
+        winner_of_game = self.winner()
+        if winner_of_game == X:
+            return 1
+        elif winner_of_game == O:
+            return -1
+        return 0
+
+
+def from_board(board):
+    """Returns the bitboard for a list-of-lists board."""
+    x = 0
+    o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return Bitboard(x, o)
+
+
+def to_board(bitboard):
+    """Returns the list-of-lists board for a bitboard."""
+    board = []
+    for i in range(3):
+        row = []
+        for j in range(3):
+            cell = 3 * i + j
+            if bitboard.x >> cell & 1:
+                row.append(X)
+            elif bitboard.o >> cell & 1:
+                row.append(O)
+            else:
+                row.append(EMPTY)
+        board.append(row)
+    return board
+
+
+def to_action(cell):
+    """Returns the (i, j) action for a cell index."""
+    return divmod(cell, 3)
+
+
+def negamax(bitboard, alpha=-math.inf, beta=math.inf):
+    """
+    Returns (value, cell) for the player to move, where value is 1 if
+    they can force a win, -1 if they must lose and 0 for a draw.
+    """
+    best_value = -math.inf
+    best_cell = None
+    for cell in bitboard.actions():
+        bitboard.move(cell)
+        tictactoe.nodes_searched += 1
+        if bitboard.wins(cell):
+            value = 1
+        elif bitboard.moves == 9:
+            value = 0
+        else:
+            value = -negamax(bitboard, -beta, -alpha)[0]
+        bitboard.undo(cell)
+        if value > best_value:
+            best_value = value
+            best_cell = cell
+        alpha = max(alpha, value)
+        if alpha >= beta or value == 1:
+            break
+    return best_value, best_cell
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on a list-of-lists
+    board, searching on a bitboard.
+    """
+    bitboard = from_board(board)
+    if bitboard.terminal():
+        return None
+    _, cell = negamax(bitboard)
+    return to_action(cell)
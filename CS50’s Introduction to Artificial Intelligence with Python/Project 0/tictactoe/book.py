@@ -0,0 +1,56 @@
+"""
+Builds the Tic Tac Toe opening book.
+
+Solves every board reachable from the initial state once and writes
+book.bin, which holds one byte for each of the 3 ** 9 board codes:
+(cell << 2) | (value + 1), where cell is the row-major index of the best
+move (15 once the game is over) and value is the board's value under
+optimal play. Boards that cannot be reached are stored as 0xFF.
+
+Usage: python book.py
+"""
+
+import tictactoe as ttt
+
+
+def reachable_boards():
+    """
+    Returns every board reachable from the initial state, keyed by code.
+    """
+    boards = {}
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        code = ttt.board_code(board)
+        if code in boards:
+            continue
+        boards[code] = board
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                stack.append(ttt.result(board, action))
+    return boards
+
+
+def build():
+    """
+    Returns the contents of book.bin.
+    """
+    entries = bytearray([ttt.BOOK_UNREACHABLE]) * 3 ** 9
+    for code, board in reachable_boards().items():
+        value = ttt.cached_value(board)
+        action = ttt.minimax(board, "cached")
+        cell = ttt.BOOK_NO_ACTION if action is None else 3 * action[0] + action[1]
+        entries[code] = (cell << 2) | (value + 1)
+    return bytes(entries)
+
+
+def main():
+    entries = build()
+    with open(ttt.BOOK_PATH, "wb") as f:
+        f.write(entries)
+    solved = sum(entry != ttt.BOOK_UNREACHABLE for entry in entries)
+    print(f"Wrote {solved} positions to {ttt.BOOK_PATH}")
+
+
+if __name__ == "__main__":
+    main()
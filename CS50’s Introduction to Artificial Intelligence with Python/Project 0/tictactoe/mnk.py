@@ -0,0 +1,253 @@
+"""
+m,n,k-game Player
+
+Generalizes Tic Tac Toe to boards with m rows and n columns, won by
+placing k marks in a row. Boards are lists of lists, as in `tictactoe`.
+The AI uses iterative-deepening alpha-beta search with a heuristic
+evaluation of open lines, and returns the best move from the deepest
+search completed within its time budget.
+"""
+
+import math
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Utility of a won game; heuristic evaluations stay strictly inside it
+WIN = 1.0
+HEURISTIC_LIMIT = 0.9
+
+
+class Timeout(Exception):
+    pass
+
+
+class Game():
+
+    def __init__(self, m=3, n=3, k=3):
+        if not (0 < k <= max(m, n)):
+            raise ValueError("k must be between 1 and the longest side")
+        self.m = m
+        self.n = n
+        self.k = k
+
+        # Number of positions generated by searches, for benchmarking
+        self.nodes_searched = 0
+
+        # Every run of k cells in a row, column or diagonal
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(
+                            [(i + di * step, j + dj * step) for step in range(k)]
+                        )
+
+        # Lines through each cell, so a move only checks its own lines
+        self.lines_through = {(i, j): [] for i in range(m) for j in range(n)}
+        for line in self.lines:
+            for cell in line:
+                self.lines_through[cell].append(line)
+
+        # Cells ordered from the center outwards, the order search tries them
+        center_i = (m - 1) / 2
+        center_j = (n - 1) / 2
+        self.move_order = sorted(
+            self.lines_through,
+            key=lambda cell: abs(cell[0] - center_i) + abs(cell[1] - center_j)
+        )
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        marks = sum(cell != EMPTY for row in board for cell in row)
+        return X if marks % 2 == 0 else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for (i, j) in self.move_order if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if board[i][j] != EMPTY:
+            raise ValueError(f"cell {action} is not empty")
+        new_board = [list(row) for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def wins(self, board, action):
+        """
+        Returns True if the mark at action completes k in a row.
+        """
+        mark = board[action[0]][action[1]]
+        return mark != EMPTY and any(
+            all(board[i][j] == mark for i, j in line)
+            for line in self.lines_through[action]
+        )
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        for line in self.lines:
+            i, j = line[0]
+            mark = board[i][j]
+            if mark != EMPTY and all(board[i][j] == mark for i, j in line):
+                return mark
+        return EMPTY
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) != EMPTY
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner_of_game = self.winner(board)
+        if winner_of_game == X:
+            return 1
+        elif winner_of_game == O:
+            return -1
+        return 0
+
+    def line_score(self, board, line):
+        """
+        Returns the contribution of one line to a board's score: positive
+        if it is still open only to X, negative if open only to O, and
+        larger the closer it is to completion.
+        """
+        x_marks = 0
+        o_marks = 0
+        for i, j in line:
+            if board[i][j] == X:
+                x_marks += 1
+            elif board[i][j] == O:
+                o_marks += 1
+        if x_marks and not o_marks:
+            return 4 ** x_marks
+        elif o_marks and not x_marks:
+            return -4 ** o_marks
+        return 0
+
+    def score(self, board):
+        """
+        Returns the sum of every line's score on a board.
+        """
+        return sum(self.line_score(board, line) for line in self.lines)
+
+    def scaled(self, score):
+        return HEURISTIC_LIMIT * math.tanh(score / 4 ** self.k)
+
+    def evaluate(self, board):
+        """
+        Returns a heuristic value of a board for X, strictly between -1
+        and 1. Lines still open to only one player count in their favour,
+        and lines closer to completion count for more.
+        """
+        return self.scaled(self.score(board))
+
+    def minimax(self, board, time_budget=1.0, max_depth=None):
+        """
+        Returns the best action found for the current player on the board
+        by iterative-deepening alpha-beta search within `time_budget`
+        seconds, or None if the game is over.
+        """
+        if self.terminal(board):
+            return None
+
+        deadline = time.monotonic() + time_budget
+        empty = sum(cell == EMPTY for row in board for cell in row)
+        max_depth = empty if max_depth is None else min(max_depth, empty)
+        work = [list(row) for row in board]
+        maximising = self.player(board) == X
+
+        ordered = [cell for cell in self.move_order if board[cell[0]][cell[1]] == EMPTY]
+        best_action = ordered[0]
+        for depth in range(1, max_depth + 1):
+            try:
+                value, action = self.search(
+                    work, depth, -math.inf, math.inf, maximising, deadline, ordered, 0
+                )
+            except Timeout:
+                break
+            best_action = action
+            # Search the previous best move first at the next depth
+            ordered.remove(action)
+            ordered.insert(0, action)
+            if abs(value) >= HEURISTIC_LIMIT:
+                break
+        return best_action
+
+    def search(self, board, depth, alpha, beta, maximising, deadline, moves, ply):
+        """
+        Returns (value, action) for a depth-limited alpha-beta search,
+        making and undoing moves on `board` in place. Wins found sooner
+        are valued higher. The deadline is checked before every move.
+        """
+        mark = X if maximising else O
+        best_value = -math.inf if maximising else math.inf
+        best_action = None
+        empty = sum(cell == EMPTY for row in board for cell in row)
+
+        # Leaf positions are scored from this board's score by rescoring
+        # only the lines through the cell just played
+        base = self.score(board) if depth == 1 else None
+
+        for action in moves:
+            if time.monotonic() > deadline:
+                raise Timeout
+            i, j = action
+            if board[i][j] != EMPTY:
+                continue
+            if depth == 1:
+                through = self.lines_through[action]
+                before = sum(self.line_score(board, line) for line in through)
+            board[i][j] = mark
+            self.nodes_searched += 1
+            try:
+                if self.wins(board, action):
+                    value = (WIN - ply / 1000) * (1 if maximising else -1)
+                elif depth == 1:
+                    after = sum(self.line_score(board, line) for line in through)
+                    value = self.scaled(base - before + after)
+                elif empty == 1:
+                    value = 0
+                else:
+                    value, _ = self.search(board, depth - 1, alpha, beta,
+                                           not maximising, deadline,
+                                           self.move_order, ply + 1)
+            finally:
+                board[i][j] = EMPTY
+
+            if maximising:
+                if value > best_value:
+                    best_value = value
+                    best_action = action
+                alpha = max(alpha, value)
+            else:
+                if value < best_value:
+                    best_value = value
+                    best_action = action
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+        return best_value, best_action
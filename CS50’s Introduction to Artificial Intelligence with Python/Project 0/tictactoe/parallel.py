@@ -0,0 +1,159 @@
+"""
+Parallel root-split search for Tic Tac Toe and m,n,k games.
+
+Each move available at the root is searched in its own task on a process
+pool, and the results are combined by the player to move. Every worker
+keeps its own transposition table for the whole life of the pool, and
+forked workers start with a copy of the parent's table.
+
+Usage: python parallel.py [--workers N] [--depth D]
+
+benchmarks positions searched per second on one core against N cores.
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mnk
+import tictactoe as ttt
+
+# Games already built in this process, keyed by (m, n, k)
+games = {}
+
+
+def game_for(m, n, k):
+    if (m, n, k) not in games:
+        games[(m, n, k)] = mnk.Game(m, n, k)
+    return games[(m, n, k)]
+
+
+def solve_tictactoe(board, search):
+    """
+    Returns (value, positions searched) for a 3x3 board using the
+    "exhaustive" or "cached" search.
+    """
+    ttt.reset_nodes_searched()
+    if ttt.terminal(board):
+        value = ttt.utility(board)
+    elif search == "cached":
+        value = ttt.cached_value(board)
+    elif ttt.player(board) == ttt.X:
+        value, _ = ttt.maximise(board)
+    else:
+        value, _ = ttt.minimise(board)
+    return value, ttt.reset_nodes_searched()
+
+
+def solve_mnk(m, n, k, board, action, depth):
+    """
+    Returns (value, positions searched) for playing action on an m,n,k
+    board, searching `depth` plies in total including the action itself.
+    """
+    game = game_for(m, n, k)
+    game.nodes_searched = 0
+    maximising = game.player(board) == ttt.X
+    value, _ = game.search([list(row) for row in board], depth,
+                           -math.inf, math.inf, maximising, math.inf,
+                           [action], 0)
+    return value, game.nodes_searched
+
+
+def best(results, maximising):
+    """
+    Returns (value, action) for the best of (action, value) results.
+    """
+    best_value = -math.inf if maximising else math.inf
+    best_action = None
+    for action, value in results:
+        if (maximising and value > best_value) or (not maximising and value < best_value):
+            best_value = value
+            best_action = action
+    return best_value, best_action
+
+
+def root_split(board, executor=None, search="cached", game=None, depth=4):
+    """
+    Returns (value, action, positions searched) for the current player,
+    searching each root move as a separate task on `executor`, or in this
+    process if there is none. With a `game`, the board is an m,n,k board
+    searched `depth` plies deep; otherwise it is a 3x3 board.
+    """
+    if game is None:
+        maximising = ttt.player(board) == ttt.X
+        moves = sorted(ttt.actions(board))
+        tasks = [(solve_tictactoe, ttt.result(board, action), search)
+                 for action in moves]
+    else:
+        maximising = game.player(board) == ttt.X
+        moves = [cell for cell in game.move_order if cell in game.actions(board)]
+        tasks = [(solve_mnk, game.m, game.n, game.k, board, action, depth)
+                 for action in moves]
+
+    if executor is None:
+        outcomes = [task[0](*task[1:]) for task in tasks]
+    else:
+        futures = [executor.submit(*task) for task in tasks]
+        outcomes = [future.result() for future in futures]
+
+    value, action = best(
+        [(action, outcome[0]) for action, outcome in zip(moves, outcomes)],
+        maximising
+    )
+    return value, action, sum(outcome[1] for outcome in outcomes)
+
+
+def parallel_minimax(board, workers=None, search="cached", game=None, depth=4):
+    """
+    Returns the best action for the current player, searching root moves
+    on a pool of `workers` processes.
+    """
+    with ProcessPoolExecutor(workers) as executor:
+        return root_split(board, executor, search, game, depth)[1]
+
+
+def benchmark(workers, depth):
+    """
+    Times single-core and `workers`-core root-split searches and returns
+    positions searched per second for each.
+    """
+    cases = [
+        ("3x3 exhaustive", ttt.initial_state(), None, "exhaustive"),
+        ("4x4 k=4", None, mnk.Game(4, 4, 4), None),
+        ("5x5 k=4", None, mnk.Game(5, 5, 4), None),
+    ]
+    report = {}
+    with ProcessPoolExecutor(workers) as executor:
+        # Start every worker before timing
+        list(executor.map(abs, range(workers)))
+        for name, board, game, search in cases:
+            if game is not None:
+                board = game.initial_state()
+            report[name] = {}
+            for label, pool in (("1 core", None), (f"{workers} cores", executor)):
+                start = time.perf_counter()
+                value, action, positions = root_split(board, pool, search, game, depth)
+                elapsed = time.perf_counter() - start
+                report[name][label] = {
+                    "action": action,
+                    "value": value,
+                    "positions": positions,
+                    "seconds": elapsed,
+                    "positions_per_second": positions / elapsed,
+                }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark root-split search.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--depth", type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.workers, args.depth), indent=2))
+
+
+if __name__ == "__main__":
+    main()
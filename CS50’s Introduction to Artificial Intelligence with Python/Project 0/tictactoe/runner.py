@@ -1,6 +1,7 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
@@ -16,15 +17,40 @@ screen = pygame.display.set_mode(size)
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+smallFont = pygame.font.Font("OpenSans-Regular.ttf", 14)
+
+# Seconds the computer appears to think before playing its move
+ai_delay = 0.5
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# AI moves are computed on a background thread so the loop keeps drawing
+ai_executor = ThreadPoolExecutor(max_workers=1)
+ai_move = None
+ai_started = None
+
+# Milliseconds taken by the last frame, and the slowest frame so far
+clock = pygame.time.Clock()
+frame_time = 0
+worst_frame_time = 0
+
+
+def cancel_ai_move():
+    """Cancels or abandons any AI move being computed."""
+    global ai_move, ai_started
+    if ai_move is not None:
+        ai_move.cancel()
+    ai_move = None
+    ai_started = None
+
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel_ai_move()
+            ai_executor.shutdown(wait=False)
             sys.exit()
 
     screen.fill(black)
@@ -110,13 +136,14 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if ai_move is None:
+                ai_move = ai_executor.submit(ttt.minimax, [list(row) for row in board])
+                ai_started = time.monotonic()
+            elif ai_move.done() and time.monotonic() - ai_started >= ai_delay:
+                move = ai_move.result()
+                ai_move = None
+                ai_started = None
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -139,8 +166,18 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    cancel_ai_move()
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+
+    # Draw frame time
+    frame = smallFont.render(
+        f"frame {frame_time} ms (worst {worst_frame_time} ms)", True, white
+    )
+    frameRect = frame.get_rect()
+    frameRect.bottomleft = (5, height - 5)
+    screen.blit(frame, frameRect)
 
     pygame.display.flip()
+    frame_time = clock.tick(60)
+    worst_frame_time = max(worst_frame_time, frame_time)
@@ -2,12 +2,51 @@
 Tic Tac Toe Player
 """
 
+import json
 import math
+import os
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Digit used for each cell value when encoding a board in base 3
+CELL_CODES = {EMPTY: 0, X: 1, O: 2}
+
+# Cell orders (as indices into the flattened board) for each of the
+# 8 rotations and reflections of the board
+SYMMETRIES = [
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),
+]
+
+# Maps canonical board codes to the value of the board under optimal play
+transposition_table = {}
+
+# Order in which alpha-beta search tries moves: center, corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Number of positions generated by searches since the last reset
+nodes_searched = 0
+
+# Perfect-play lookup table built by book.py, with one byte per board code
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# Byte stored in the book for boards that cannot be reached in play
+BOOK_UNREACHABLE = 0xFF
+
+# Cell stored in a book entry for boards where the game is over
+BOOK_NO_ACTION = 15
+
+# Contents of book.bin, loaded on first use; empty if there is no book
+book = None
+
 
 def initial_state():
     """
@@ -98,9 +137,49 @@ def utility(board):
         return 0
 
 
-def minimax(board):
+def minimax(board, search="book"):
     """
     Returns the optimal action for the current player on the board.
+
+    `search` selects the algorithm: "book" (opening book lookup, falling
+    back to the transposition table), "cached" (transposition table),
+    "alphabeta" (alpha-beta pruning), "bitboard" (alpha-beta pruning on
+    a bitboard) or "exhaustive" (full game tree).
+    """
+    if search == "book":
+        entry = book_entry(board)
+        if entry is not None:
+            return entry[0]
+        search = "cached"
+    if search == "alphabeta":
+        return alphabeta(board)[1]
+    if search == "bitboard":
+        import bitboard
+        return bitboard.minimax(board)
+    if search == "exhaustive":
+        return exhaustive_minimax(board)
+    if search != "cached":
+        raise ValueError(f"unknown search: {search}")
+
+    if terminal(board):
+        return None
+    turn = player(board)
+    best_utility = None
+    best_action = None
+    for action in sorted(actions(board)):
+        new_utility = cached_value(result(board, action))
+        if (best_utility is None
+                or (turn == X and new_utility > best_utility)
+                or (turn == O and new_utility < best_utility)):
+            best_utility = new_utility
+            best_action = action
+    return best_action
+
+
+def exhaustive_minimax(board):
+    """
+    Returns the optimal action for the current player on the board,
+    searching the whole game tree without a transposition table.
     """
     turn = player(board)
     if turn == X:
@@ -110,15 +189,161 @@ def minimax(board):
     return best_action
 
 
+def reset_nodes_searched():
+    """
+    Resets `nodes_searched` and returns its previous value.
+    """
+    global nodes_searched
+    count = nodes_searched
+    nodes_searched = 0
+    return count
+
+
+def ordered_actions(board):
+    """
+    Returns the actions available on the board, moves that win for the
+    current player first and then in `MOVE_ORDER`.
+    """
+    turn = player(board)
+    available = [action for action in MOVE_ORDER if board[action[0]][action[1]] == EMPTY]
+    winning = [action for action in available if winner(result(board, action)) == turn]
+    return winning + [action for action in available if action not in winning]
+
+
+def alphabeta(board, alpha=-math.inf, beta=math.inf):
+    """
+    Returns (value, action) for the current player on the board using
+    alpha-beta pruning, stopping early once a win is found.
+    """
+    global nodes_searched
+    maximising = player(board) == X
+    best_utility = -math.inf if maximising else math.inf
+    best_action = None
+    for action in ordered_actions(board):
+        new_board = result(board, action)
+        nodes_searched += 1
+        if terminal(new_board):
+            new_utility = utility(new_board)
+        else:
+            (new_utility, _) = alphabeta(new_board, alpha, beta)
+        if maximising:
+            if new_utility > best_utility:
+                best_utility = new_utility
+                best_action = action
+            alpha = max(alpha, best_utility)
+            if best_utility == 1:
+                break
+        else:
+            if new_utility < best_utility:
+                best_utility = new_utility
+                best_action = action
+            beta = min(beta, best_utility)
+            if best_utility == -1:
+                break
+        if alpha >= beta:
+            break
+    return best_utility, best_action
+
+
+def board_code(board):
+    """
+    Returns the base-3 integer encoding of the board, with row-major
+    cells as digits from least to most significant.
+    """
+    code = 0
+    for cell in reversed([cell for row in board for cell in row]):
+        code = code * 3 + CELL_CODES[cell]
+    return code
+
+
+def load_book():
+    """
+    Returns the opening book, reading it from BOOK_PATH on first use.
+    """
+    global book
+    if book is None:
+        try:
+            with open(BOOK_PATH, "rb") as f:
+                book = f.read()
+        except OSError:
+            book = b""
+    return book
+
+
+def book_entry(board):
+    """
+    Returns (action, value) for the board from the opening book, where
+    action is None once the game is over, or None if the book does not
+    have the board.
+    """
+    entries = load_book()
+    code = board_code(board)
+    if code >= len(entries) or entries[code] == BOOK_UNREACHABLE:
+        return None
+    cell, value = divmod(entries[code], 4)
+    action = None if cell == BOOK_NO_ACTION else divmod(cell, 3)
+    return action, value - 1
+
+
+def canonical_code(board):
+    """
+    Returns an integer identifying the board up to rotation and reflection.
+    """
+    cells = [CELL_CODES[cell] for row in board for cell in row]
+    return min(
+        sum(cells[index] * 3 ** position
+            for position, index in enumerate(symmetry))
+        for symmetry in SYMMETRIES
+    )
+
+
+def cached_value(board):
+    """
+    Returns the value of the board under optimal play, solving each
+    position at most once per process through `transposition_table`.
+    """
+    global nodes_searched
+    code = canonical_code(board)
+    if code in transposition_table:
+        return transposition_table[code]
+    nodes_searched += 1
+    if terminal(board):
+        value = utility(board)
+    else:
+        values = [cached_value(result(board, action)) for action in actions(board)]
+        value = max(values) if player(board) == X else min(values)
+    transposition_table[code] = value
+    return value
+
+
+def save_table(path):
+    """
+    Saves `transposition_table` as JSON.
+    """
+    with open(path, "w") as f:
+        json.dump({str(code): value for code, value in transposition_table.items()}, f)
+
+
+def load_table(path):
+    """
+    Loads positions saved by `save_table` into `transposition_table`.
+    """
+    with open(path) as f:
+        for code, value in json.load(f).items():
+            transposition_table[int(code)] = value
+
+
 def maximise(board):
     """
     Maximise board from current state.
     """
+    global nodes_searched
     best_utility = -math.inf
     best_action = None
     possible_actions = actions(board)
     for action in possible_actions:
         new_board = result(board, action)
+        nodes_searched += 1
         if terminal(new_board):
             new_utility = utility(new_board)
         else:
@@ -133,11 +358,13 @@ def minimise(board):
     """
     Minimise board from current state.
     """
+    global nodes_searched
     best_utility = math.inf
     best_action = None
     possible_actions = actions(board)
     for action in possible_actions:
         new_board = result(board, action)
+        nodes_searched += 1
         if terminal(new_board):
             new_utility = utility(new_board)
         else:
@@ -0,0 +1,174 @@
+"""
+Headless Tic Tac Toe tournament between search strategies.
+
+Every ordered pair of strategies plays a number of games, one as X and
+one as O. Each game opens with a few seeded random moves so deterministic
+strategies still meet a variety of positions. For every strategy the
+tournament records wins, draws and losses, positions searched, per-move
+latency as a histogram, and how many of its moves threw away value
+compared with perfect play, then prints everything as JSON.
+
+Usage: python tournament.py [--games N] [--seed S] [--opening PLIES]
+                            [--strategies alphabeta,cached,book,...]
+"""
+
+import argparse
+import json
+import random
+import time
+
+import tictactoe as ttt
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+LATENCY_BUCKETS = [0.01, 0.1, 1, 10, 100, 1000]
+HISTOGRAM_LABELS = ([f"<{bound}ms" for bound in LATENCY_BUCKETS]
+                    + [f">={LATENCY_BUCKETS[-1]}ms"])
+
+SEARCHES = ["exhaustive", "alphabeta", "cached", "book", "bitboard"]
+STRATEGIES = SEARCHES + ["random"]
+
+
+def choose(strategy, board, rng):
+    """Returns the action a strategy plays on the board."""
+    if strategy == "random":
+        return rng.choice(sorted(ttt.actions(board)))
+    return ttt.minimax(board, strategy)
+
+
+def bucket(milliseconds):
+    """Returns the latency histogram label for a move's duration."""
+    for bound, label in zip(LATENCY_BUCKETS, HISTOGRAM_LABELS):
+        if milliseconds < bound:
+            return label
+    return HISTOGRAM_LABELS[-1]
+
+
+def value(board):
+    """
+    Returns the board's value under perfect play, from the opening book if
+    it has the board and by alpha-beta search otherwise. Neither touches
+    the transposition table, so judging moves does not warm it for the
+    "cached" strategy.
+    """
+    entry = ttt.book_entry(board)
+    if entry is not None:
+        return entry[1]
+    if ttt.terminal(board):
+        return ttt.utility(board)
+    return ttt.alphabeta(board)[0]
+
+
+def new_record():
+    return {
+        "wins": 0, "draws": 0, "losses": 0,
+        "moves": 0, "nodes": 0, "suboptimal_moves": 0,
+        "latency_ms": {"total": 0.0, "max": 0.0},
+        "histogram": {label: 0 for label in HISTOGRAM_LABELS},
+    }
+
+
+def play(x_strategy, o_strategy, records, rng, opening):
+    """
+    Plays one game, updating `records`, and returns the winner or None.
+    """
+    board = ttt.initial_state()
+    strategies = {ttt.X: x_strategy, ttt.O: o_strategy}
+
+    # Seeded random opening moves, which are not credited to either side
+    for _ in range(opening):
+        if ttt.terminal(board):
+            break
+        board = ttt.result(board, rng.choice(sorted(ttt.actions(board))))
+
+    while not ttt.terminal(board):
+        turn = ttt.player(board)
+        strategy = strategies[turn]
+        record = records[strategy]
+
+        ttt.reset_nodes_searched()
+        start = time.perf_counter()
+        action = choose(strategy, board, rng)
+        elapsed = (time.perf_counter() - start) * 1000
+        record["nodes"] += ttt.reset_nodes_searched()
+
+        record["moves"] += 1
+        record["latency_ms"]["total"] += elapsed
+        record["latency_ms"]["max"] = max(record["latency_ms"]["max"], elapsed)
+        record["histogram"][bucket(elapsed)] += 1
+
+        new_board = ttt.result(board, action)
+        if value(new_board) != value(board):
+            record["suboptimal_moves"] += 1
+        ttt.reset_nodes_searched()
+        board = new_board
+
+    winner = ttt.winner(board)
+    for mark, strategy in strategies.items():
+        if winner is None:
+            records[strategy]["draws"] += 1
+        elif winner == mark:
+            records[strategy]["wins"] += 1
+        else:
+            records[strategy]["losses"] += 1
+    return winner
+
+
+def tournament(strategies, games=100, seed=0, opening=2):
+    """
+    Plays `games` games for every ordered pair of strategies and returns
+    the results as a dictionary.
+    """
+    rng = random.Random(seed)
+    records = {strategy: new_record() for strategy in strategies}
+    pairings = {}
+    for x_strategy in strategies:
+        for o_strategy in strategies:
+            if x_strategy == o_strategy:
+                continue
+            outcome = {"X": 0, "O": 0, "draw": 0}
+            for _ in range(games):
+                winner = play(x_strategy, o_strategy, records, rng, opening)
+                outcome[winner or "draw"] += 1
+            pairings[f"{x_strategy} (X) vs {o_strategy} (O)"] = outcome
+
+    for record in records.values():
+        played = record["wins"] + record["draws"] + record["losses"]
+        record["games"] = played
+        record["win_rate"] = record["wins"] / played if played else 0
+        record["draw_rate"] = record["draws"] / played if played else 0
+        moves = record["moves"]
+        record["latency_ms"]["mean"] = (
+            record["latency_ms"]["total"] / moves if moves else 0
+        )
+        record["nodes_per_move"] = record["nodes"] / moves if moves else 0
+
+    return {
+        "games_per_pairing": games,
+        "seed": seed,
+        "opening_plies": opening,
+        "strategies": records,
+        "pairings": pairings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a Tic Tac Toe tournament.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--opening", type=int, default=2)
+    parser.add_argument("--strategies",
+                        default="alphabeta,cached,book,bitboard,random")
+    args = parser.parse_args()
+
+    strategies = args.strategies.split(",")
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            parser.error(f"unknown strategy: {strategy}")
+
+    print(json.dumps(
+        tournament(strategies, args.games, args.seed, args.opening), indent=2
+    ))
+
+
+if __name__ == "__main__":
+    main()
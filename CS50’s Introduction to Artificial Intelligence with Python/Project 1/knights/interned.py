@@ -0,0 +1,142 @@
+"""
+Immutable, hash-consed logical sentences.
+
+Building a sentence returns the existing object if a structurally equal
+one is still alive, so identical subformulas are shared and a knowledge
+base is a DAG rather than a tree. Each sentence computes its hash and
+symbol set once, when it is built, and cannot be changed afterwards.
+
+The classes subclass those in `logic` and are built the same way, so
+`from interned import *` can replace `from logic import *` wherever
+knowledge is not modified with `And.add`. Evaluation, compilation and the
+SAT backend accept interned sentences unchanged.
+"""
+
+import weakref
+
+import logic
+from logic import Sentence, model_check
+
+# Live sentences, keyed by class and the name or children they were built from
+table = weakref.WeakValueDictionary()
+
+
+class Interned():
+    """
+    Mixin for interned sentences. Subclasses list their children in
+    `fields`, which are interned before a sentence is looked up.
+    """
+    __slots__ = ()
+
+    def __new__(cls, *args):
+        args = tuple(args if cls is Symbol else (intern(arg) for arg in args))
+        key = (cls,) + args
+        sentence = table.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            if cls.fields is None:
+                object.__setattr__(sentence, cls.children_field, args)
+            else:
+                for field, value in zip(cls.fields, args):
+                    object.__setattr__(sentence, field, value)
+            # The base classes hash the structure, so equal mutable and
+            # interned sentences hash the same
+            object.__setattr__(sentence, "_hash", super(Interned, sentence).__hash__())
+            object.__setattr__(sentence, "_symbols", frozenset(cls.collect(sentence, args)))
+            table[key] = sentence
+        return sentence
+
+    def __init__(self, *args):
+        pass
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        # Unpickling builds the sentence again, interning it in that process
+        if type(self).fields is None:
+            return (type(self), getattr(self, type(self).children_field))
+        return (type(self), tuple(getattr(self, field) for field in type(self).fields))
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, Interned) or not isinstance(other, Sentence):
+            return False
+        return hash(self) == hash(other) and intern(other) is self
+
+    def __hash__(self):
+        return self._hash
+
+    @staticmethod
+    def collect(sentence, args):
+        return set().union(*[arg.symbols() for arg in args])
+
+    def symbols(self):
+        return self._symbols
+
+
+class Symbol(Interned, logic.Symbol):
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+    fields = ("name",)
+
+    @staticmethod
+    def collect(sentence, args):
+        return {sentence.name}
+
+
+class Not(Interned, logic.Not):
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+    fields = ("operand",)
+
+
+class And(Interned, logic.And):
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+    fields = None
+    children_field = "conjuncts"
+
+    def add(self, conjunct):
+        raise AttributeError("And is immutable; build a new And instead")
+
+
+class Or(Interned, logic.Or):
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+    fields = None
+    children_field = "disjuncts"
+
+
+class Implication(Interned, logic.Implication):
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+    fields = ("antecedent", "consequent")
+
+
+class Biconditional(Interned, logic.Biconditional):
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+    fields = ("left", "right")
+
+
+def intern(sentence):
+    """Returns the interned sentence equal to a logical sentence."""
+    if isinstance(sentence, Interned):
+        return sentence
+    Sentence.validate(sentence)
+    if isinstance(sentence, logic.Symbol):
+        return Symbol(sentence.name)
+    if isinstance(sentence, logic.Not):
+        return Not(sentence.operand)
+    if isinstance(sentence, logic.And):
+        return And(*sentence.conjuncts)
+    if isinstance(sentence, logic.Or):
+        return Or(*sentence.disjuncts)
+    if isinstance(sentence, logic.Implication):
+        return Implication(sentence.antecedent, sentence.consequent)
+    if isinstance(sentence, logic.Biconditional):
+        return Biconditional(sentence.left, sentence.right)
+    raise TypeError(f"cannot intern {type(sentence).__name__}")
+
+
+__all__ = ["Sentence", "Symbol", "Not", "And", "Or", "Implication",
+           "Biconditional", "intern", "model_check"]
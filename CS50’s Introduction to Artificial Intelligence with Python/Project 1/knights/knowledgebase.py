@@ -0,0 +1,146 @@
+"""
+Knowledge base that answers many entailment queries from one enumeration.
+
+The models of the knowledge are found once and kept as packed bitsets,
+integers in which bit i is set if the model makes symbol i true. Adding a
+sentence filters the cached models, and a query is entailed if every
+cached model satisfies it.
+"""
+
+from logic import Sentence, And, compile_sentence
+
+import sat
+import simplify
+
+
+class KnowledgeBase():
+
+    def __init__(self, knowledge=None, method="enumerate"):
+        """
+        Creates a knowledge base holding `knowledge`, whose models are
+        found by enumerating every assignment, or with the SAT solver if
+        `method` is "sat", which is faster when there are few models. With
+        "simplify", symbols fixed by the knowledge's top-level facts are
+        found first and only the others are enumerated.
+        """
+        if method not in ("enumerate", "sat", "simplify"):
+            raise ValueError(f"unknown method: {method}")
+
+        # Symbol names in bit order, and the bit for each name
+        self.symbols = []
+        self.index = {}
+
+        # Models of the knowledge, over self.symbols
+        self.models = [0]
+        self.sentences = []
+
+        # What simplification removed, if the "simplify" method was used
+        self.report = None
+
+        if knowledge is None:
+            return
+        if method == "enumerate":
+            self.add(knowledge)
+            return
+
+        Sentence.validate(knowledge)
+        self.sentences.append(knowledge)
+        self.extend(knowledge.symbols())
+        if method == "simplify":
+            self.models = self.reduced(knowledge)
+            return
+        self.models = [
+            sum(1 << self.index[name] for name, value in model.items() if value)
+            for model in sat.all_models(knowledge)
+        ]
+
+    def extend(self, symbols):
+        """
+        Adds bits for symbols not yet in the knowledge base and returns how
+        many were added. Existing models are not expanded over the new bits.
+        """
+        added = sorted(set(symbols) - set(self.index))
+        for name in added:
+            self.index[name] = len(self.symbols)
+            self.symbols.append(name)
+        return len(added)
+
+    def expanded(self, added):
+        """
+        Yields every cached model combined with each assignment of the
+        `added` symbols most recently given bits.
+        """
+        shift = len(self.symbols) - added
+        for model in self.models:
+            for assignment in range(1 << added):
+                yield model | assignment << shift
+
+    def reduced(self, knowledge):
+        """
+        Returns the models of the knowledge, enumerating only the symbols
+        it does not fix.
+        """
+        sentence, fixed, self.report = simplify.reduce(knowledge)
+        if simplify.is_false(sentence):
+            return []
+        satisfies = compile_sentence(sentence, self.index)
+        base = sum(1 << self.index[name] for name, value in fixed.items() if value)
+        free = sum(1 << self.index[name] for name in self.symbols if name not in fixed)
+
+        # Every subset of the free bits, from all of them down to none
+        models = []
+        subset = free
+        while True:
+            if satisfies(base | subset):
+                models.append(base | subset)
+            if subset == 0:
+                break
+            subset = (subset - 1) & free
+        return models
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge, keeping the models it allows."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        added = self.extend(sentence.symbols())
+        satisfies = compile_sentence(sentence, self.index)
+        self.models = [model for model in self.expanded(added) if satisfies(model)]
+
+    def knowledge(self):
+        """Returns a sentence of everything added to the knowledge base."""
+        return And(*self.sentences)
+
+    def satisfiable(self):
+        return len(self.models) > 0
+
+    def entailed(self, queries):
+        """
+        Returns the queries entailed by the knowledge, in their original
+        order, checking all of them in one pass over the models.
+        """
+        queries = list(queries)
+        for query in queries:
+            Sentence.validate(query)
+
+        # Queries may mention symbols the knowledge does not, which are then
+        # free in every model
+        index = dict(self.index)
+        for name in sorted(set().union(*[query.symbols() for query in queries]) - set(index)):
+            index[name] = len(index)
+        added = len(index) - len(self.symbols)
+        shift = len(self.symbols)
+
+        remaining = [(query, compile_sentence(query, index)) for query in queries]
+        for model in self.models:
+            for assignment in range(1 << added):
+                full = model | assignment << shift
+                remaining = [(query, satisfies) for query, satisfies in remaining
+                             if satisfies(full)]
+                if not remaining:
+                    return []
+        entailed = {id(query) for query, _ in remaining}
+        return [query for query in queries if id(query) in entailed]
+
+    def entails(self, query):
+        """Checks if the knowledge entails query."""
+        return len(self.entailed([query])) == 1
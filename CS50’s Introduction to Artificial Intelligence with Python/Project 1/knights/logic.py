@@ -1,7 +1,25 @@
 import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Partitions of the model space per worker in a parallel model check, so
+# work stays balanced and a counter-model cancels most of what is left
+PARTITIONS_PER_WORKER = 8
+
+# Models a worker checks between looks at the stop flag
+STOP_CHECK_INTERVAL = 4096
+
+# Set in worker processes when another partition has found a counter-model
+stop_flag = None
+
+# Height of the subformulas that compiled code computes into variables, as it
+# does shared ones, which keeps generated expressions well inside the parser's
+# limit of 200 nested parentheses
+HOIST_HEIGHT = 32
 
 
 class Sentence():
+    __slots__ = ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -15,6 +33,14 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def expression(self, index):
+        """
+        Returns a Python expression evaluating the logical sentence over
+        an integer `m`, in which symbol `name` is true if bit index[name]
+        of `m` is set.
+        """
+        raise Exception("nothing to compile")
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -43,6 +69,7 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
     def __init__(self, name):
         self.name = name
@@ -68,8 +95,13 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def expression(self, index):
+        return f"(m & {1 << index[self.name]})"
+
 
 class Not(Sentence):
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
@@ -92,8 +124,13 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def expression(self, index):
+        return f"(not {self.operand.expression(index)})"
+
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
@@ -127,10 +164,19 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return set().union(*[conjunct.symbols() for conjunct in self.conjuncts])
+
+    def expression(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.expression(index) for conjunct in self.conjuncts
+        ) + ")"
 
 
 class Or(Sentence):
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
@@ -158,10 +204,19 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return set().union(*[disjunct.symbols() for disjunct in self.disjuncts])
+
+    def expression(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.expression(index) for disjunct in self.disjuncts
+        ) + ")"
 
 
 class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
@@ -189,10 +244,17 @@ class Implication(Sentence):
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return set().union(self.antecedent.symbols(), self.consequent.symbols())
+
+    def expression(self, index):
+        antecedent = self.antecedent.expression(index)
+        consequent = self.consequent.expression(index)
+        return f"(not {antecedent} or {consequent})"
 
 
 class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
@@ -222,42 +284,226 @@ class Biconditional(Sentence):
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        return set().union(self.left.symbols(), self.right.symbols())
 
+    def expression(self, index):
+        left = self.left.expression(index)
+        right = self.right.expression(index)
+        return f"((not {left}) == (not {right}))"
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
+class Variable(Sentence):
+    """
+    Stands for a subformula that compiled code computes into a local
+    variable before the expression that uses it.
+    """
+    __slots__ = ("name",)
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+    def __init__(self, name):
+        self.name = name
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+    def expression(self, index):
+        return self.name
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+def operands(sentence):
+    """Returns the operands of a compound sentence, or None for others."""
+    if isinstance(sentence, Not):
+        return [sentence.operand]
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    if isinstance(sentence, Or):
+        return sentence.disjuncts
+    if isinstance(sentence, Implication):
+        return [sentence.antecedent, sentence.consequent]
+    if isinstance(sentence, Biconditional):
+        return [sentence.left, sentence.right]
+    return None
+
+
+def shared(sentence):
+    """Returns the ids of compound subformulas used more than once."""
+    seen = set()
+    repeated = set()
+    stack = [sentence]
+    while stack:
+        sentence = stack.pop()
+        children = operands(sentence)
+        if children is None:
+            continue
+        if id(sentence) in seen:
+            repeated.add(id(sentence))
+            continue
+        seen.add(id(sentence))
+        stack.extend(children)
+    return repeated
+
+
+def hoist(sentence, index, lines, hoisted, repeated, prefix):
+    """
+    Returns (sentence, height), where subformulas of the sentence that are
+    used more than once, or whose height is a multiple of HOIST_HEIGHT,
+    are replaced by variables, and the statements computing them are
+    appended to `lines`. `hoisted` maps subformulas already visited to
+    their results, and variable names start with `prefix`.
+    """
+    children = operands(sentence)
+    if children is None:
+        return sentence, 1
+    if id(sentence) in hoisted:
+        return hoisted[id(sentence)]
+
+    results = [hoist(child, index, lines, hoisted, repeated, prefix)
+               for child in children]
+    children = [child for child, _ in results]
+    height = 1 + max([child_height for _, child_height in results], default=0)
+
+    if isinstance(sentence, Not):
+        flat = Not(*children)
+    elif isinstance(sentence, And):
+        flat = And(*children)
+    elif isinstance(sentence, Or):
+        flat = Or(*children)
+    elif isinstance(sentence, Implication):
+        flat = Implication(*children)
+    else:
+        flat = Biconditional(*children)
+
+    if height % HOIST_HEIGHT == 0 or id(sentence) in repeated:
+        variable = Variable(f"{prefix}{len(lines)}")
+        lines.append(f"{variable.name} = {flat.expression(index)}")
+        flat, height = variable, 1
+    hoisted[id(sentence)] = (flat, height)
+    return flat, height
+
+
+def flat_expression(sentence, index, lines, prefix="t"):
+    """
+    Returns an expression for a sentence, as `expression` does, after
+    appending to `lines` the statements it needs to run first.
+    """
+    flat, _ = hoist(sentence, index, lines, {}, shared(sentence), prefix)
+    return flat.expression(index)
+
+
+def indented(lines, depth):
+    return "".join("    " * depth + line + "\n" for line in lines)
+
+
+def compile_sentence(sentence, index):
+    """
+    Compiles a logical sentence into a function of an integer model `m`,
+    in which symbol `name` is true if bit index[name] of `m` is set.
+    """
+    lines = []
+    expression = flat_expression(sentence, index, lines)
+    if not lines:
+        return eval(f"lambda m: bool({expression})")
+    source = (
+        "def satisfies(m):\n"
+        + indented(lines, 1)
+        + f"    return bool({expression})\n"
+    )
+    namespace = {}
+    exec(source, namespace)
+    return namespace["satisfies"]
+
+
+def compile_entailment(knowledge, query, index):
+    """
+    Compiles a function of `start` and `stop` that checks every model
+    numbered from `start` up to `stop`, returning False if any satisfies
+    the knowledge but not the query.
+    """
+    knowledge_lines = []
+    knowledge_expression = flat_expression(knowledge, index, knowledge_lines)
+    query_lines = []
+    query_expression = flat_expression(query, index, query_lines, "q")
+
+    # Query variables are only computed in models of the knowledge
+    source = (
+        "def check(start, stop):\n"
+        "    for m in range(start, stop):\n"
+        + indented(knowledge_lines, 2)
+        + f"        if not {knowledge_expression}:\n"
+        "            continue\n"
+        + indented(query_lines, 2)
+        + f"        if not {query_expression}:\n"
+        "            return False\n"
+        "    return True\n"
+    )
+    namespace = {}
+    exec(source, namespace)
+    return namespace["check"]
+
+
+def set_stop_flag(flag):
+    global stop_flag
+    stop_flag = flag
+
+
+def check_partition(knowledge, query, symbols, start, stop):
+    """
+    Checks that knowledge entails query in the models numbered from `start`
+    up to `stop`. Runs in worker processes, which compile the sentences
+    themselves since compiled functions cannot be pickled, and gives up,
+    returning True, once the stop flag is set.
+    """
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    check = compile_entailment(knowledge, query, index)
+    for chunk in range(start, stop, STOP_CHECK_INTERVAL):
+        if stop_flag is not None and stop_flag.is_set():
+            return True
+        if not check(chunk, min(chunk + STOP_CHECK_INTERVAL, stop)):
+            return False
+    return True
+
+
+def parallel_model_check(knowledge, query, symbols, workers):
+    """
+    Checks if knowledge base entails query over `symbols` on a pool of
+    `workers` processes. The highest symbols are fixed to split the models
+    into contiguous partitions. As soon as one finds a counter-model,
+    partitions not yet started are cancelled and running ones stop at
+    their next look at the shared stop flag.
+    """
+    models = 1 << len(symbols)
+    partitions = 1
+    while partitions < workers * PARTITIONS_PER_WORKER and partitions < models:
+        partitions *= 2
+    size = models // partitions
+
+    flag = multiprocessing.Event()
+    executor = ProcessPoolExecutor(workers, initializer=set_stop_flag,
+                                   initargs=(flag,))
+    try:
+        futures = [
+            executor.submit(check_partition, knowledge, query, symbols,
+                            start, start + size)
+            for start in range(0, models, size)
+        ]
+        for future in as_completed(futures):
+            if not future.result():
+                flag.set()
+                return False
+        return True
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def model_check(knowledge, query, workers=1):
+    """
+    Checks if knowledge base entails query, splitting the models among
+    `workers` processes if there is more than one.
+    """
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    symbols = sorted(set().union(knowledge.symbols(), query.symbols()))
+    if workers > 1:
+        return parallel_model_check(knowledge, query, symbols, workers)
+
+    # Check that knowledge entails query in every model, numbering models
+    # by the bitmask of which symbols they make true
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    check = compile_entailment(knowledge, query, index)
+    return check(0, 1 << len(symbols))
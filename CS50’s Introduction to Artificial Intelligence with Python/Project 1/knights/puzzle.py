@@ -1,4 +1,5 @@
 from logic import *
+from knowledgebase import KnowledgeBase
 
 AKnight = Symbol("A is a Knight")
 AKnave = Symbol("A is a Knave")
@@ -75,9 +76,8 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
-                    print(f"    {symbol}")
+            for symbol in KnowledgeBase(knowledge).entailed(symbols):
+                print(f"    {symbol}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,367 @@
+"""
+SAT-based entailment for logical sentences.
+
+Knowledge entails a query exactly when knowledge ∧ ¬query has no model.
+That formula is converted to conjunctive normal form with the Tseitin
+encoding, which adds one variable per subformula instead of expanding it,
+and handed to a CDCL solver with two watched literals per clause, unit
+propagation, first-UIP clause learning, activity-based branching and
+restarts. `model_check` here is a drop-in replacement for the one in
+`logic` that does not enumerate every model.
+"""
+
+from logic import Sentence, Symbol, Not, And, Or, Implication, Biconditional
+
+
+class CNF():
+    """
+    Clauses over integer variables numbered from 1, where literal v means
+    variable v is true and -v means it is false.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.variables = 0
+        # Maps symbol names to their variables
+        self.symbols = {}
+        # Maps subformulas already encoded to their literals
+        self.encoded = {}
+
+    def variable(self):
+        self.variables += 1
+        return self.variables
+
+    def add(self, clause):
+        self.clauses.append(list(clause))
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to a sentence, adding clauses that
+        define a new variable for each subformula (Tseitin encoding).
+        """
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.symbols:
+                self.symbols[sentence.name] = self.variable()
+            return self.symbols[sentence.name]
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.encoded:
+            return self.encoded[sentence]
+
+        if isinstance(sentence, And):
+            parts = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            v = self.variable()
+            for part in parts:
+                self.add([-v, part])
+            self.add([v] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            v = self.variable()
+            self.add([-v] + parts)
+            for part in parts:
+                self.add([v, -part])
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            v = self.variable()
+            self.add([-v, -a, b])
+            self.add([v, a])
+            self.add([v, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.variable()
+            self.add([-v, -a, b])
+            self.add([-v, a, -b])
+            self.add([v, a, b])
+            self.add([v, -a, -b])
+        else:
+            raise TypeError(f"cannot encode {type(sentence).__name__}")
+
+        self.encoded[sentence] = v
+        return v
+
+    def assert_sentence(self, sentence):
+        """Adds clauses requiring a sentence to be true."""
+        Sentence.validate(sentence)
+        # Top-level conjunctions are asserted conjunct by conjunct
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.assert_sentence(conjunct)
+        else:
+            self.add([self.literal(sentence)])
+
+
+class Solver():
+    """
+    CDCL SAT solver. `solve` returns a satisfying assignment as a list
+    indexed by variable, holding True or False, or None if there is none.
+    """
+
+    # Number of conflicts before the first restart, and its growth factor
+    RESTART_FIRST = 100
+    RESTART_GROWTH = 1.5
+
+    # Factor by which variable activities are bumped up after each conflict
+    ACTIVITY_GROWTH = 1 / 0.95
+
+    def __init__(self, variables, clauses):
+        self.variables = variables
+        self.clauses = []
+        # Maps literals to the clauses watching them
+        self.watches = {}
+        for v in range(1, variables + 1):
+            self.watches[v] = []
+            self.watches[-v] = []
+
+        # value[v] is 1, -1 or 0 for true, false or unassigned
+        self.value = [0] * (variables + 1)
+        self.level = [0] * (variables + 1)
+        self.reason = [None] * (variables + 1)
+        self.phase = [-1] * (variables + 1)
+        self.activity = [0.0] * (variables + 1)
+        self.increment = 1.0
+        self.trail = []
+        self.trail_limits = []
+        self.propagated = 0
+        self.conflicts = 0
+        self.decisions = 0
+        self.unsatisfiable = False
+
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def literal_value(self, literal):
+        value = self.value[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, clause):
+        """Adds an input clause at decision level 0."""
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        clause = [literal for literal in clause if self.literal_value(literal) != -1]
+        if any(self.literal_value(literal) == 1 for literal in clause):
+            return
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        v = abs(literal)
+        self.value[v] = 1 if literal > 0 else -1
+        self.level[v] = len(self.trail_limits)
+        self.reason[v] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns literals forced by unit clauses until none are left.
+        Returns the index of a conflicting clause, or None.
+        """
+        while self.propagated < len(self.trail):
+            false_literal = -self.trail[self.propagated]
+            self.propagated += 1
+            watching = self.watches[false_literal]
+            kept = []
+            conflict = None
+            i = 0
+            while i < len(watching):
+                index = watching[i]
+                i += 1
+                clause = self.clauses[index]
+                # Keep the false literal in the second watched position
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.literal_value(clause[0]) == 1:
+                    kept.append(index)
+                    continue
+
+                for k in range(2, len(clause)):
+                    if self.literal_value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.literal_value(clause[0]) == -1:
+                        conflict = index
+                        kept.extend(watching[i:])
+                        break
+                    self.assign(clause[0], index)
+            self.watches[false_literal] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns a learnt clause, with the asserting literal first, and the
+        level to backjump to, using the first unique implication point.
+        """
+        current = len(self.trail_limits)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        literal = None
+        clause = self.clauses[conflict]
+        position = len(self.trail) - 1
+        while True:
+            for other in clause:
+                if literal is not None and other == literal:
+                    continue
+                v = abs(other)
+                if v in seen or self.level[v] == 0:
+                    continue
+                seen.add(v)
+                self.bump(v)
+                if self.level[v] == current:
+                    pending += 1
+                else:
+                    learnt.append(other)
+            # Walk back along the trail to the next literal to resolve on
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reason[abs(literal)]]
+        learnt[0] = -literal
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # Watch the literal from the highest remaining level second
+        highest = max(range(1, len(learnt)), key=lambda k: self.level[abs(learnt[k])])
+        learnt[1], learnt[highest] = learnt[highest], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def backjump(self, level):
+        """Undoes every assignment made above a decision level."""
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            v = abs(literal)
+            self.phase[v] = self.value[v]
+            self.value[v] = 0
+            self.reason[v] = None
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.propagated = len(self.trail)
+
+    def decide(self):
+        """
+        Returns the unassigned variable with the highest activity, as a
+        literal with its saved phase, or None if all are assigned.
+        """
+        best = None
+        best_activity = -1.0
+        for v in range(1, self.variables + 1):
+            if self.value[v] == 0 and self.activity[v] > best_activity:
+                best = v
+                best_activity = self.activity[v]
+        if best is None:
+            return None
+        return best if self.phase[best] == 1 else -best
+
+    def solve(self):
+        if self.unsatisfiable:
+            return None
+        if self.propagate() is not None:
+            return None
+
+        restart_limit = self.RESTART_FIRST
+        conflicts_since_restart = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts_since_restart += 1
+                if not self.trail_limits:
+                    return None
+                learnt, level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.assign(learnt[0], self.watch(learnt))
+                self.increment *= self.ACTIVITY_GROWTH
+                continue
+
+            if conflicts_since_restart >= restart_limit:
+                conflicts_since_restart = 0
+                restart_limit *= self.RESTART_GROWTH
+                self.backjump(0)
+                continue
+
+            literal = self.decide()
+            if literal is None:
+                return [None] + [value == 1 for value in self.value[1:]]
+            self.decisions += 1
+            self.trail_limits.append(len(self.trail))
+            self.assign(literal, None)
+
+
+def satisfying_model(sentence):
+    """
+    Returns a model of a sentence as a dictionary mapping symbol names to
+    truth values, or None if the sentence is unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.assert_sentence(sentence)
+    assignment = Solver(cnf.variables, cnf.clauses).solve()
+    if assignment is None:
+        return None
+    return {name: assignment[v] for name, v in cnf.symbols.items()}
+
+
+def all_models(sentence):
+    """
+    Yields every model of a sentence, as a dictionary mapping the names of
+    its symbols to truth values, by solving again with each model found
+    ruled out by a blocking clause.
+    """
+    cnf = CNF()
+    cnf.assert_sentence(sentence)
+    for name in sentence.symbols():
+        cnf.literal(Symbol(name))
+    solver = Solver(cnf.variables, cnf.clauses)
+    while True:
+        assignment = solver.solve()
+        if assignment is None:
+            return
+        model = {name: assignment[v] for name, v in cnf.symbols.items()}
+        yield model
+
+        # Every other variable is defined by the symbols, so blocking the
+        # symbols' values blocks this model
+        solver.backjump(0)
+        solver.add_clause([-v if model[name] else v for name, v in cnf.symbols.items()])
+
+
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query."""
+    cnf = CNF()
+    cnf.assert_sentence(knowledge)
+    cnf.add([-cnf.literal(query)])
+    return Solver(cnf.variables, cnf.clauses).solve() is None
@@ -0,0 +1,193 @@
+"""
+Simplification of logical sentences before model checking.
+
+The simplifier flattens nested conjunctions and disjunctions, removes
+duplicate and constant operands and folds constants through every
+connective. The empty And and Or serve as the constants true and false,
+since evaluation, compilation and the SAT backend already handle them.
+
+`reduce` also runs unit propagation: symbols asserted or denied at the
+top level of the knowledge are fixed, substituted everywhere and the
+knowledge simplified again, until no more are found. The knowledge is
+then equivalent to the reduced sentence together with the fixed symbols,
+so enumeration only ranges over the symbols that are left.
+"""
+
+import logic
+from logic import Sentence, Symbol, Not, And, Or, Implication, Biconditional
+
+TRUE = And()
+FALSE = Or()
+
+
+def is_true(sentence):
+    return isinstance(sentence, And) and not sentence.conjuncts
+
+
+def is_false(sentence):
+    return isinstance(sentence, Or) and not sentence.disjuncts
+
+
+def negate(sentence):
+    """Returns the negation of a simplified sentence, folding constants."""
+    if is_true(sentence):
+        return FALSE
+    if is_false(sentence):
+        return TRUE
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def combine(operands, connective, identity, absorbing):
+    """
+    Returns a conjunction or disjunction of simplified operands, flattening
+    nested ones of the same connective and removing duplicates. `identity`
+    and `absorbing` test for the constants that are dropped or that decide
+    the result; a pair of complementary operands also decides it.
+    """
+    flat = []
+    for operand in operands:
+        if isinstance(operand, connective):
+            flat.extend(operand.conjuncts if connective is And else operand.disjuncts)
+        else:
+            flat.append(operand)
+
+    kept = {}
+    for operand in flat:
+        if absorbing(operand) or negate(operand) in kept:
+            return FALSE if connective is And else TRUE
+        if not identity(operand):
+            kept.setdefault(operand, operand)
+    if len(kept) == 1:
+        return next(iter(kept))
+    return connective(*kept)
+
+
+def simplify(sentence, fixed=None):
+    """
+    Returns a simplified sentence equivalent to `sentence` in every model
+    that agrees with `fixed`, a dictionary of symbol names to truth values.
+    """
+    fixed = fixed or {}
+    if isinstance(sentence, Symbol):
+        if sentence.name in fixed:
+            return TRUE if fixed[sentence.name] else FALSE
+        return sentence
+    if isinstance(sentence, Not):
+        return negate(simplify(sentence.operand, fixed))
+    if isinstance(sentence, And):
+        return combine([simplify(conjunct, fixed) for conjunct in sentence.conjuncts],
+                       And, is_true, is_false)
+    if isinstance(sentence, Or):
+        return combine([simplify(disjunct, fixed) for disjunct in sentence.disjuncts],
+                       Or, is_false, is_true)
+    if isinstance(sentence, Implication):
+        antecedent = simplify(sentence.antecedent, fixed)
+        # The consequent only matters in models where the antecedent holds
+        assumed = literals(antecedent) if is_literal(antecedent) else {}
+        consequent = simplify(sentence.consequent, {**fixed, **assumed})
+        if is_true(antecedent):
+            return consequent
+        if is_false(antecedent) or is_true(consequent) or antecedent == consequent:
+            return TRUE
+        if is_false(consequent):
+            return negate(antecedent)
+        return Implication(antecedent, consequent)
+    if isinstance(sentence, Biconditional):
+        left = simplify(sentence.left, fixed)
+        right = simplify(sentence.right, fixed)
+        for a, b in ((left, right), (right, left)):
+            if is_true(a):
+                return b
+            if is_false(a):
+                return negate(b)
+        if left == right:
+            return TRUE
+        if left == negate(right):
+            return FALSE
+        return Biconditional(left, right)
+    Sentence.validate(sentence)
+    raise TypeError(f"cannot simplify {type(sentence).__name__}")
+
+
+def is_literal(sentence):
+    return isinstance(sentence, Symbol) or (
+        isinstance(sentence, Not) and isinstance(sentence.operand, Symbol)
+    )
+
+
+def literals(sentence):
+    """
+    Returns the symbols a simplified sentence asserts or denies at its top
+    level, as a dictionary of names to truth values.
+    """
+    conjuncts = sentence.conjuncts if isinstance(sentence, And) else [sentence]
+    found = {}
+    for conjunct in conjuncts:
+        if isinstance(conjunct, Symbol):
+            found[conjunct.name] = True
+        elif is_literal(conjunct):
+            found[conjunct.operand.name] = False
+    return found
+
+
+def nodes(sentence):
+    """Returns the number of nodes in a sentence, counting shared ones again."""
+    if isinstance(sentence, Symbol):
+        return 1
+    if isinstance(sentence, Not):
+        return 1 + nodes(sentence.operand)
+    if isinstance(sentence, And):
+        return 1 + sum(nodes(conjunct) for conjunct in sentence.conjuncts)
+    if isinstance(sentence, Or):
+        return 1 + sum(nodes(disjunct) for disjunct in sentence.disjuncts)
+    if isinstance(sentence, Implication):
+        return 1 + nodes(sentence.antecedent) + nodes(sentence.consequent)
+    return 1 + nodes(sentence.left) + nodes(sentence.right)
+
+
+def reduce(knowledge):
+    """
+    Returns (sentence, fixed, report): the knowledge simplified with its
+    top-level facts propagated, the symbols those facts fix, and counts of
+    the symbols and nodes removed. The knowledge is equivalent to the
+    sentence in conjunction with the fixed symbols, unless the sentence is
+    false, in which case the knowledge has no models.
+    """
+    fixed = {}
+    sentence = simplify(knowledge)
+    while True:
+        found = {name: value for name, value in literals(sentence).items()
+                 if name not in fixed}
+        if not found:
+            break
+        fixed.update(found)
+        sentence = simplify(sentence, fixed)
+
+    symbols_before = len(knowledge.symbols())
+    nodes_before = nodes(knowledge)
+    report = {
+        "symbols_before": symbols_before,
+        "symbols_after": len(sentence.symbols()),
+        "symbols_fixed": len(fixed),
+        "nodes_before": nodes_before,
+        "nodes_after": nodes(sentence),
+    }
+    report["symbols_removed"] = symbols_before - report["symbols_after"]
+    report["nodes_removed"] = nodes_before - report["nodes_after"]
+    return sentence, fixed, report
+
+
+def model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, enumerating models only over
+    the symbols left after simplifying both.
+    """
+    sentence, fixed, _ = reduce(knowledge)
+    if is_false(sentence):
+        return True
+    query = simplify(query, fixed)
+    if is_true(query):
+        return True
+    return logic.model_check(sentence, query)
@@ -0,0 +1,78 @@
+import multiprocessing
+import unittest
+from unittest import mock
+
+from logic import *
+
+
+class ParallelModelCheckTest(unittest.TestCase):
+
+    def test_agrees_with_serial(self):
+        a, b, c = Symbol("a"), Symbol("b"), Symbol("c")
+        knowledge = And(Implication(a, b), Or(a, c), Not(And(b, c)))
+        for query in (b, c, Or(b, c), Not(c), a):
+            self.assertEqual(model_check(knowledge, query, workers=2),
+                             model_check(knowledge, query))
+
+    def test_counter_model_sets_stop_flag(self):
+        symbols = [Symbol(f"s{i}") for i in range(16)]
+        knowledge = And(*[
+            Implication(symbols[i], Or(symbols[(i + 1) % 16], symbols[0]))
+            for i in range(16)
+        ])
+        flag = multiprocessing.Event()
+        with mock.patch("logic.multiprocessing.Event", return_value=flag):
+            self.assertFalse(model_check(knowledge, Or(*symbols), workers=4))
+        self.assertTrue(flag.is_set())
+
+
+class CheckPartitionTest(unittest.TestCase):
+
+    def setUp(self):
+        # Every model satisfies both, so a partition only stops early
+        # because of the stop flag
+        a = Symbol("a")
+        self.sentence = Or(a, Not(a))
+        self.symbols = ["a"] + [f"s{i}" for i in range(14)]
+        self.models = 1 << len(self.symbols)
+        self.flag = multiprocessing.Event()
+        set_stop_flag(self.flag)
+        self.addCleanup(set_stop_flag, None)
+
+    def checked_chunks(self, after_first=None):
+        """
+        Runs check_partition over every model, counting the chunks it
+        checks and calling `after_first` once the first is done.
+        """
+        chunks = []
+
+        def counting(knowledge, query, index):
+            check = compile_entailment(knowledge, query, index)
+
+            def counted(start, stop):
+                chunks.append(start)
+                result = check(start, stop)
+                if after_first is not None and len(chunks) == 1:
+                    after_first()
+                return result
+            return counted
+
+        with mock.patch("logic.compile_entailment", counting):
+            self.assertTrue(check_partition(self.sentence, self.sentence,
+                                            self.symbols, 0, self.models))
+        return chunks
+
+    def test_runs_every_chunk_without_stop(self):
+        self.assertEqual(len(self.checked_chunks()),
+                         self.models // STOP_CHECK_INTERVAL)
+
+    def test_no_chunk_runs_once_stopped(self):
+        self.flag.set()
+        self.assertEqual(self.checked_chunks(), [])
+
+    def test_stops_after_flag_is_set(self):
+        self.assertEqual(self.checked_chunks(after_first=self.flag.set), [0])
+
+
+if __name__ == "__main__":
+    unittest.main()